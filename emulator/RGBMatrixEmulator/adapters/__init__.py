@@ -1,4 +1,4 @@
-import importlib, json
+import importlib
 
 from RGBMatrixEmulator.logger import Logger
 
@@ -33,40 +33,93 @@ adapters = [
         "class": "TurtleAdapter",
         "type": "turtle",
     },
+    {
+        "path": "RGBMatrixEmulator.adapters.null_adapter",
+        "class": "NullAdapter",
+        "type": "null",
+    },
+    {
+        "path": "RGBMatrixEmulator.adapters.recorder_adapter",
+        "class": "RecorderAdapter",
+        "type": "recorder",
+    },
 ]
 
+# Third-party packages can provide display adapters by declaring an entry point in this group, e.g. in pyproject.toml:
+#
+#   [project.entry-points."RGBMatrixEmulator.adapters"]
+#   my_adapter = "my_package.adapter:MyAdapter"
+ENTRY_POINT_GROUP = "RGBMatrixEmulator.adapters"
+
+# Adapters are only imported when they are first requested, since most of them pull in heavy optional dependencies
 ADAPTER_TYPES = {}
 
-try:
-    with open("emulator_config.json") as config_file:
-        suppress_adapter_load_errors = json.load(config_file).get(
-            "suppress_adapter_load_errors", False
-        )
-except:
-    suppress_adapter_load_errors = False
-
-for adapter in adapters:
-    package_path = adapter.get("path")
-    adapter_class = adapter.get("class")
-    adapter_name = adapter.get("type")
-    try:
-        package = importlib.import_module(package_path)
-        adapter = getattr(package, adapter_class)
 
-        ADAPTER_TYPES[adapter_name] = adapter
-    except Exception as ex:
-        if suppress_adapter_load_errors:
-            continue
+def adapter_names():
+    """
+    Names of all known display adapters, whether or not they can be loaded.
+    """
+    names = [adapter.get("type") for adapter in adapters]
 
-        Logger.exception(
-            f"""
-Failed to load {adapter_class} for "{adapter_name}" display adapter!
+    for entry_point in _entry_points():
+        if entry_point.name not in names:
+            names.append(entry_point.name)
+
+    return names
+
+
+def load_adapter(adapter_name, suppress_errors=False):
+    """
+    Imports and returns the display adapter class for `adapter_name`, or None if it can't be loaded.
+    """
+    adapter_name = adapter_name.lower()
+
+    if adapter_name in ADAPTER_TYPES:
+        return ADAPTER_TYPES[adapter_name]
+
+    try:
+        adapter = _import_adapter(adapter_name)
+    except Exception:
+        if not suppress_errors:
+            Logger.exception(f"""
+Failed to load the "{adapter_name}" display adapter!
 
-If this is not your configured display adapter, the emulator will continue to load.
+Check that you have installed the dependencies it requires. The emulator will try to fall back to another adapter.
 
 You can suppress this error in the `emulator_config.json` by adding:
 
   "suppress_adapter_load_errors": true
 
-"""
-        )
+""")
+
+        return None
+
+    if adapter is not None:
+        ADAPTER_TYPES[adapter_name] = adapter
+
+    return adapter
+
+
+def _import_adapter(adapter_name):
+    for adapter in adapters:
+        if adapter.get("type") == adapter_name:
+            package = importlib.import_module(adapter.get("path"))
+
+            return getattr(package, adapter.get("class"))
+
+    # Only scan installed packages' metadata if it isn't a built-in adapter
+    for entry_point in _entry_points():
+        if entry_point.name.lower() == adapter_name:
+            return entry_point.load()
+
+    return None
+
+
+def _entry_points():
+    from importlib.metadata import entry_points
+
+    try:
+        return entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:
+        # Python < 3.10 returns entry points as a dict keyed by group
+        return entry_points().get(ENTRY_POINT_GROUP, [])
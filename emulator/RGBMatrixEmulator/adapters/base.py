@@ -1,7 +1,18 @@
+import os
+import tempfile
+
 import numpy as np
 
 from PIL import Image, ImageDraw
 from RGBMatrixEmulator import version
+from RGBMatrixEmulator.emulation.vsync import VSync
+from RGBMatrixEmulator.logger import Logger
+
+MASK_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "RGBMatrixEmulator",
+    "masks",
+)
 
 
 def draw_circle_mask(drawer, x, y, pixel_size, color):
@@ -22,39 +33,131 @@ def draw_square_mask(drawer, x, y, pixel_size, color):
 
 class BaseAdapter:
     SUPPORTS_ALTERNATE_PIXEL_STYLE = False
-    INSTANCE = None
+
+    # Adapters that set this receive draw_to_screen(pixels, dirty_rects=...) with the (x, y, width, height) regions
+    # changed since the previous frame, or None if they aren't known
+    SUPPORTS_DIRTY_RECTS = False
+
+    # Adapters that never call _get_masked_image can clear this to skip building the LED mask and upscaling buffers
+    USES_MASKED_IMAGES = True
+    # One adapter per matrix name (RGBMatrixOptions.name), so several matrices can run in one process
+    INSTANCES = {}
+
+    # Tiled masks keyed by (window size, pixel size, pixel style), shared across adapter instances
+    MASKS = {}
 
     def __init__(self, width, height, options):
         self.width = width
         self.height = height
         self.options = options
-        self.__black = Image.new("RGB", self.options.window_size(), "black")
-        self.__mask = self.__draw_mask()
+        if self.USES_MASKED_IMAGES:
+            self.__mask = self.__load_mask()
+            self.__allocate_frame_buffers()
+        self.vsync = VSync(self.vsync_fps() if options.vsync else 0)
+        self.presented_canvas = None
         self.loaded = False
 
+    def __load_mask(self):
+        """
+        Returns the tiled LED mask, building it only if it isn't already cached in memory or on disk.
+        """
+        window_width, window_height = self.options.window_size()
+        key = (
+            (window_width, window_height),
+            self.options.pixel_size,
+            self.options.pixel_style,
+        )
+
+        if key not in BaseAdapter.MASKS:
+            cache_path = os.path.join(
+                MASK_CACHE_DIR,
+                "mask-{}x{}-{}px-{}.npy".format(window_width, window_height, *key[1:]),
+            )
+
+            try:
+                mask = np.load(cache_path)
+            except (OSError, ValueError):
+                mask = None
+
+            if mask is None or mask.shape != (window_height, window_width):
+                mask = self.__draw_mask()
+                self.__save_mask(mask, cache_path)
+
+            BaseAdapter.MASKS[key] = self.__tile_mask(mask)
+
+        return BaseAdapter.MASKS[key]
+
     def __draw_mask(self):
-        mask = Image.new("L", self.options.window_size())
-        drawer = ImageDraw.Draw(mask)
+        """
+        Draws a single LED cell and tiles it across the window.
+        """
         pixel_size = self.options.pixel_size
-        width, height = self.options.window_size()
+        cell = Image.new("L", (pixel_size, pixel_size))
         draw_mask_shape = (
             draw_circle_mask
             if self.options.pixel_style == "circle"
             else draw_square_mask
         )
-        for y in range(0, height, pixel_size):
-            for x in range(0, width, pixel_size):
-                draw_mask_shape(drawer, x, y, pixel_size, 255)
+        draw_mask_shape(ImageDraw.Draw(cell), 0, 0, pixel_size, 1)
+
+        return np.tile(np.asarray(cell, dtype=np.uint8), (self.height, self.width))
+
+    def __save_mask(self, mask, cache_path):
+        try:
+            os.makedirs(MASK_CACHE_DIR, exist_ok=True)
+
+            # Write to a temporary file first so that concurrent emulators never load a partial mask
+            with tempfile.NamedTemporaryFile(
+                dir=MASK_CACHE_DIR, suffix=".npy", delete=False
+            ) as f:
+                np.save(f, mask)
+            os.replace(f.name, cache_path)
+        except OSError as ex:
+            Logger.debug("Unable to cache LED mask at {}: {}".format(cache_path, ex))
+
+    def __tile_mask(self, mask):
+        """
+        Converts the tiled mask into a 0/1 array shaped (rows, pixel_size, cols, pixel_size).
+
+        This shape lets each LED broadcast across its own block of the upscaled frame without an intermediate resize.
+        """
+        pixel_size = self.options.pixel_size
+        mask = (mask > 0).astype(np.uint32)
 
-        return mask
+        return mask.reshape(self.height, pixel_size, self.width, pixel_size)
+
+    def __allocate_frame_buffers(self):
+        """
+        Preallocates the buffers reused by every call to _get_masked_image.
+
+        Pixels are packed as RGBX so that each LED is a single uint32, which keeps the broadcast multiply's inner loop long.
+        """
+        pixel_size = self.options.pixel_size
+
+        self.__rgbx = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+        self.__packed = self.__rgbx.view(np.uint32)[..., 0]
+        self.__frame = np.zeros(
+            (self.height * pixel_size, self.width * pixel_size), dtype=np.uint32
+        )
+        self.__frame_blocks = self.__frame.reshape(self.__mask.shape)
+        self.__last_pixels = None
+        self.__last_image = None
+        self.__index_mask = None
 
     @classmethod
-    def get_instance(cls, *args, **kwargs):
-        if cls.INSTANCE is None:
-            instance = cls(*args, **kwargs)
-            cls.INSTANCE = instance
+    def get_instance(cls, width, height, options):
+        key = (cls, options.name)
+        if key not in BaseAdapter.INSTANCES:
+            BaseAdapter.INSTANCES[key] = cls(width, height, options)
 
-        return cls.INSTANCE
+        return BaseAdapter.INSTANCES[key]
+
+    def vsync_fps(self):
+        """
+        Frame rate to pace SwapOnVSync to when "vsync" is enabled. Adapters without a display refresh rate of their
+        own return 0, so every swap is presented as soon as it's made.
+        """
+        return 0
 
     def pixel_out_of_bounds(self, x, y):
         if x < 0 or x >= self.width:
@@ -66,25 +169,67 @@ class BaseAdapter:
         return False
 
     def _get_masked_image(self, pixels):
-        image = Image.fromarray(np.array(pixels, dtype=np.uint8), "RGB")
-        image = image.resize(self.options.window_size(), Image.NEAREST)
+        pixels = np.asarray(pixels, dtype=np.uint8)
 
-        return Image.composite(image, self.__black, self.__mask)
+        # Frames are frequently re-presented unchanged, so reuse the last result when possible
+        if self.__last_pixels is not None and np.array_equal(
+            pixels, self.__last_pixels
+        ):
+            return self.__last_image
+
+        self.__rgbx[..., :3] = pixels
+        np.multiply(
+            self.__packed[:, None, :, None], self.__mask, out=self.__frame_blocks
+        )
+        image = Image.frombytes(
+            "RGB", self.options.window_size(), self.__frame, "raw", "RGBX"
+        )
+
+        self.__last_pixels = pixels.copy()
+        self.__last_image = image
+
+        return image
+
+    def _get_masked_palette_image(self, indices, palette):
+        """
+        Upscales and masks a 2D array of palette indices into a "P" mode image.
+
+        Masked-out areas are written as index 0, so the palette's first color must be black.
+        """
+        if self.__index_mask is None:
+            self.__index_mask = self.__mask.astype(np.uint8)
+
+        frame = np.empty(self.__frame.shape, dtype=np.uint8)
+        np.multiply(
+            indices[:, None, :, None],
+            self.__index_mask,
+            out=frame.reshape(self.__mask.shape),
+        )
+
+        image = Image.fromarray(frame, "P")
+        image.putpalette(palette)
+
+        return image
 
     def emulator_details_text(self):
-        details_text = "RGBME v{} - {}x{} Matrix | {}x{} Chain | {}px per LED ({}) | {}"
-
-        return details_text.format(
-            version.__version__,
-            self.options.cols,
-            self.options.rows,
-            self.options.chain_length,
-            self.options.parallel,
-            self.options.pixel_size,
-            self.options.pixel_style.upper(),
-            self.__class__.__name__,
+        details_text = (
+            "RGBME v{} - {}x{} Matrix | {}x{} Chain | {}px per LED ({}) | {}".format(
+                version.__version__,
+                self.options.cols,
+                self.options.rows,
+                self.options.chain_length,
+                self.options.parallel,
+                self.options.pixel_size,
+                self.options.pixel_style.upper(),
+                self.__class__.__name__,
+            )
         )
 
+        if self.options.name:
+            details_text = '"{}" {}'.format(self.options.name, details_text)
+
+        return details_text
+
     # This method is required for the pygame adapter but nothing else, so just skip it if not defined.
     def check_for_quit_event(self):
         pass
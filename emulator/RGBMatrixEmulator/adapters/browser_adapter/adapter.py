@@ -1,23 +1,107 @@
+import atexit
+import hashlib
 import io
+import multiprocessing
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
 
 from RGBMatrixEmulator.adapters.base import BaseAdapter
+from RGBMatrixEmulator.adapters.browser_adapter.frame_buffer import SharedFrameBuffer
+from RGBMatrixEmulator.adapters.browser_adapter.metrics import PipelineMetrics
 from RGBMatrixEmulator.adapters.browser_adapter.server import Server
+from RGBMatrixEmulator.emulation.vsync import smooth_time
 from RGBMatrixEmulator.logger import Logger
 
 
+def get_process_context():
+    # Forking doesn't re-run the user's script in the child, so scripts don't need an `if __name__ == "__main__"` guard
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+
+    return multiprocessing.get_context()
+
+
+def serve_shared_frames(width, height, options, frame_buffer_name, frame_ready):
+    """
+    Entry point for the display server process.
+    """
+    adapter = BrowserAdapter(width, height, options)
+    adapter.serve_frames(
+        SharedFrameBuffer(width, height, name=frame_buffer_name), frame_ready
+    )
+
+
 class BrowserAdapter(BaseAdapter):
     SUPPORTS_ALTERNATE_PIXEL_STYLE = True
+    SUPPORTS_DIRTY_RECTS = True
     IMAGE_FORMATS = {"bmp": "BMP", "jpeg": "JPEG", "png": "PNG", "webp": "WebP"}
+    ADAPTIVE_IMAGE_FORMAT = "auto"
+    TRANSPORTS = ["image", "raw", "delta"]
+
+    # Raw transport messages start with the frame type followed by the LED width and height
+    RAW_FRAME_HEADER = struct.Struct(">BHH")
+    RAW_KEYFRAME = 0
+    RAW_DELTA_FRAME = 1
+
+    # Delta frames are a sequence of changed rectangles (x, y, width, height), each followed by its RGB bytes
+    DELTA_RECT_HEADER = struct.Struct(">HHHH")
+    DELTA_TILE_SIZE = 8
+
+    # Candidate codecs for the "auto" image format as (label, PIL format, save params).
+    # Frames with few enough colors are encoded losslessly from a palette, everything else is encoded lossy.
+    PALETTE_CODECS = [
+        ("PNG", "PNG", {}),
+        ("WebP-lossless", "WebP", {"lossless": True}),
+    ]
+    LOSSY_CODECS = [
+        ("JPEG", "JPEG", {}),
+        ("WebP", "WebP", {}),
+    ]
+    PALETTE_MAX_COLORS = 256
+    CODEC_PROBE_INTERVAL = 300
 
     def __init__(self, width, height, options):
         super().__init__(width, height, options)
         self.__server = None
-        self.image = None
+        self.__served_matrix = None
+        self.__image = None
+        self.__image_pixels = None
+        self.__image_lock = threading.Lock()
+        self.__previous_pixels = None
+        self.__frames_since_keyframe = 0
+        self.keyframe = None
+        self.etag = None
+        self.frame_hash = None
+        self.encoded_frames = 0
+        self.skipped_encodes = 0
+        self.dropped_frames = 0
+        self.delta_frames = 0
+        self.image_codec = None
+        self.image_content_type = None
+        self.handoff_time = None
+        self.encode_time = None
+        self.render_time = None
         self.default_image_format = "JPEG"
 
+        self.metrics = None
+        if options.browser.metrics:
+            pipeline_metrics = PipelineMetrics.instance()
+            if pipeline_metrics is None:
+                Logger.warning(
+                    '"metrics" is enabled, but prometheus_client is not installed. Install it to serve /metrics.'
+                )
+            else:
+                self.metrics = pipeline_metrics.for_matrix(self)
+
         image_format = options.browser.image_format
         if image_format.lower() in self.IMAGE_FORMATS:
             self.image_format = self.IMAGE_FORMATS[image_format.lower()]
+        elif image_format.lower() == self.ADAPTIVE_IMAGE_FORMAT:
+            self.image_format = self.ADAPTIVE_IMAGE_FORMAT
         else:
             Logger.warning(
                 "Invalid browser image format '{}', falling back to '{}'".format(
@@ -28,24 +112,507 @@ class BrowserAdapter(BaseAdapter):
                 self.default_image_format.lower()
             )
 
+        self.default_transport = "image"
+
+        transport = options.browser.transport
+        if transport.lower() in self.TRANSPORTS:
+            self.transport = transport.lower()
+        else:
+            Logger.warning(
+                "Invalid browser transport '{}', falling back to '{}'".format(
+                    transport, self.default_transport
+                )
+            )
+            self.transport = self.default_transport
+
+        # Chosen codec and encodes since it was last probed, keyed by "palette" or "lossy" frames
+        self.__codec_choices = {}
+
+        # Single-slot mailbox between the render thread and the encoder thread. Only the latest frame is kept.
+        self.__mailbox = None
+        self.__mailbox_ready = threading.Condition()
+        self.__encoder = None
+
+        # Frame handoff to the display server process, if the server runs out of process
+        self.__frame_buffer = None
+        self.__frame_ready = None
+        self.__server_process = None
+
+    def vsync_fps(self):
+        return self.options.browser.target_fps
+
     def load_emulator_window(self):
         if self.loaded:
             return
 
         Logger.info(self.emulator_details_text())
 
-        self.__server = Server(self)
+        if self.options.browser.server_process:
+            if not self.options.name:
+                self.__start_server_process()
+                self.loaded = True
+                return
+
+            Logger.warning(
+                'Named matrices share their process\'s server, so "server_process" is ignored for matrix "{}"'.format(
+                    self.options.name
+                )
+            )
+
+        self.__start_server()
+
+        self.__encoder = threading.Thread(
+            target=self.__encode_frames,
+            name="RGBMEEncoderThread",
+            daemon=True,
+        )
+        self.__encoder.start()
+
+        self.loaded = True
+
+    def draw_to_screen(self, pixels, dirty_rects=None):
+        """
+        Hands the frame to the encoder thread without waiting for it to be encoded.
+
+        If the encoder hasn't picked up the previous frame yet, that frame is dropped in favor of this one.
+        Frames drawn before the emulator window is loaded are encoded synchronously.
+        """
+        render_time = self.__take_render_time()
+
+        if self.__server_process is not None:
+            self.__publish_frame(pixels, render_time)
+            return
+
+        if render_time is not None:
+            self.__record_render_time(render_time * 1000)
+
+        if self.__encoder is None:
+            self.encode_frame(pixels, dirty_rects)
+            return
+
+        start = time.perf_counter()
+        frame = np.array(pixels, dtype=np.uint8)
+
+        with self.__mailbox_ready:
+            if self.__mailbox is not None:
+                self.dropped_frames += 1
+                if self.metrics is not None:
+                    self.metrics.encoder_dropped_frames.inc()
+
+                # The dropped frame's changes still need to reach the encoder
+                dropped_rects = self.__mailbox[1]
+                if dirty_rects is not None and dropped_rects is not None:
+                    dirty_rects = dropped_rects + dirty_rects
+                else:
+                    dirty_rects = None
+
+            self.__mailbox = (frame, dirty_rects)
+            self.__mailbox_ready.notify()
+
+        self.handoff_time = smooth_time(
+            self.handoff_time, (time.perf_counter() - start) * 1000
+        )
+
+    def __start_server(self):
+        """
+        Serves this matrix from the process's server for its port, starting the server if it isn't running yet.
+        """
+        self.__server = Server.get(self.options.browser.port)
+        self.__served_matrix = self.__server.add_matrix(self)
         self.__server.run()
 
+    def __start_server_process(self):
+        """
+        Runs the server and encoder in a separate process so they don't compete with the render loop for the GIL.
+        """
+        context = get_process_context()
+
+        self.__frame_buffer = SharedFrameBuffer(self.width, self.height)
+        self.__frame_ready = context.Event()
+        self.__server_process = context.Process(
+            target=serve_shared_frames,
+            args=(
+                self.width,
+                self.height,
+                self.options,
+                self.__frame_buffer.name,
+                self.__frame_ready,
+            ),
+            name="RGBMEServerProcess",
+            daemon=True,
+        )
+        self.__server_process.start()
+
+        atexit.register(self.__stop_server_process)
+
+    def __stop_server_process(self):
+        self.__server_process.terminate()
+        self.__server_process.join(timeout=1)
+        self.__frame_buffer.close()
+
+    def __take_render_time(self):
+        """
+        Returns how long the script spent drawing this frame, or None if it wasn't swapped on vsync.
+        """
+        render_time, self.vsync.render_time = self.vsync.render_time, None
+
+        return render_time
+
+    def __record_render_time(self, render_time_ms):
+        self.render_time = render_time_ms
+
+        if self.metrics is not None:
+            self.metrics.render_time.observe(render_time_ms / 1000)
+
+    def __publish_frame(self, pixels, render_time):
+        start = time.perf_counter()
+
+        self.__frame_buffer.write(
+            pixels,
+            {
+                **self.vsync.stats(),
+                "handoff_time_ms": self.handoff_time,
+                "render_time_ms": (
+                    render_time * 1000 if render_time is not None else None
+                ),
+            },
+        )
+        self.__frame_ready.set()
+
+        self.handoff_time = smooth_time(
+            self.handoff_time, (time.perf_counter() - start) * 1000
+        )
+
+    def serve_frames(self, frame_buffer, frame_ready):
+        """
+        Runs the server and encodes frames published to the shared frame buffer by the render process.
+
+        Blocks until the render process exits.
+        """
+        self.__frame_buffer = frame_buffer
+
+        self.__start_server()
         self.loaded = True
 
-    def draw_to_screen(self, pixels):
-        image = self._get_masked_image(pixels)
+        frame = np.zeros(frame_buffer.shape, dtype=np.uint8)
+        sequence = 0
+        render_process = multiprocessing.parent_process()
+
+        while render_process is None or render_process.is_alive():
+            if not frame_ready.wait(timeout=1):
+                continue
+
+            frame_ready.clear()
+
+            latest = frame_buffer.read(frame)
+            if latest == sequence:
+                continue
+
+            # Any sequence numbers we skipped over were overwritten before we got to them
+            self.dropped_frames += latest - sequence - 1
+            if self.metrics is not None:
+                self.metrics.encoder_dropped_frames.inc(latest - sequence - 1)
+            sequence = latest
+
+            render_time_ms = frame_buffer.stats()["render_time_ms"]
+            if render_time_ms is not None:
+                self.__record_render_time(render_time_ms)
+
+            try:
+                self.encode_frame(frame)
+            except Exception:
+                Logger.exception("Failed to encode frame!")
+
+    def __encode_frames(self):
+        while True:
+            with self.__mailbox_ready:
+                while self.__mailbox is None:
+                    self.__mailbox_ready.wait()
+
+                (frame, dirty_rects), self.__mailbox = self.__mailbox, None
+
+            try:
+                self.encode_frame(frame, dirty_rects)
+            except Exception:
+                Logger.exception("Failed to encode frame!")
+
+    def encode_frame(self, pixels, dirty_rects=None):
+        """
+        Encodes and broadcasts a frame. `dirty_rects` lists the (x, y, width, height) regions that changed since
+        the previous frame, if known, which lets unchanged frames and delta frames skip comparing the whole frame.
+        """
+        # Applications often present the same frame repeatedly, so skip encoding unless something changed
+        if dirty_rects == [] and self.frame_hash is not None:
+            self.skipped_encodes += 1
+            return
+
+        pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+        frame_hash = hashlib.blake2b(pixels, digest_size=16).hexdigest()
+
+        if frame_hash == self.frame_hash:
+            self.skipped_encodes += 1
+            return
+
+        start = time.perf_counter()
+
+        if self.transport == "image":
+            frame = keyframe = self.__encode_image(pixels)
+
+            with self.__image_lock:
+                self.__image = frame
+                self.__image_pixels = None
+        else:
+            pixels = pixels.copy()
+            frame = keyframe = self.__encode_raw_frame(pixels)
+
+            if self.transport == "delta":
+                frame = self.__select_delta_frame(pixels, keyframe, dirty_rects)
+
+            # Static images are only encoded if someone asks for one
+            with self.__image_lock:
+                self.__image = None
+                self.__image_pixels = pixels
+
+        self.keyframe = keyframe
+        self.frame_hash = frame_hash
+        self.etag = '"{}"'.format(frame_hash)
+        self.encoded_frames += 1
+        encode_time = time.perf_counter() - start
+        self.encode_time = smooth_time(self.encode_time, encode_time * 1000)
+
+        if self.metrics is not None:
+            self.metrics.encode_time.observe(encode_time)
+            self.metrics.encoded_bytes.observe(len(frame))
+
+        if self.__server is not None:
+            self.__server.broadcast(self.__served_matrix, frame, keyframe)
+
+    def _get_masked_image(self, pixels):
+        if self.metrics is None:
+            return super()._get_masked_image(pixels)
+
+        with self.metrics.masked_image_time.time():
+            return super()._get_masked_image(pixels)
+
+    def _get_masked_palette_image(self, indices, palette):
+        if self.metrics is None:
+            return super()._get_masked_palette_image(indices, palette)
+
+        with self.metrics.masked_image_time.time():
+            return super()._get_masked_palette_image(indices, palette)
+
+    @property
+    def image(self):
+        """
+        The current frame as an upscaled, masked image in the configured image format.
+        """
+        with self.__image_lock:
+            if self.__image is None and self.__image_pixels is not None:
+                self.__image = self.__encode_image(self.__image_pixels)
+                self.__image_pixels = None
+
+            return self.__image
+
+    def __encode_image(self, pixels):
+        if self.image_format == self.ADAPTIVE_IMAGE_FORMAT:
+            return self.__encode_adaptive_image(pixels)
+
+        self.image_codec = self.image_format
+        self.image_content_type = "image/{}".format(self.image_format.lower())
+
+        return self.__save_image(self._get_masked_image(pixels), self.image_format)
+
+    def __save_image(self, image, image_format, **params):
         with io.BytesIO() as bytesIO:
             image.save(
                 bytesIO,
-                self.image_format,
+                image_format,
                 quality=self.options.browser.quality,
                 optimize=True,
+                **params,
+            )
+            return bytesIO.getvalue()
+
+    def __encode_adaptive_image(self, pixels):
+        """
+        Encodes low-color frames as indexed-palette images and everything else with a lossy codec.
+
+        Each kind of frame periodically tries all of its candidate codecs and keeps using the best one until the next probe.
+        """
+        palette_frame = self.__get_palette_frame(pixels)
+
+        if palette_frame is None:
+            kind, codecs = "lossy", self.LOSSY_CODECS
+            image = self._get_masked_image(pixels)
+        else:
+            kind, codecs = "palette", self.PALETTE_CODECS
+            image = self._get_masked_palette_image(*palette_frame)
+
+        codec, encodes_since_probe = self.__codec_choices.get(kind, (None, 0))
+
+        if codec is None or encodes_since_probe >= self.CODEC_PROBE_INTERVAL:
+            results = []
+            for candidate in codecs:
+                start = time.perf_counter()
+                data = self.__save_image(image, candidate[1], **candidate[2])
+                results.append((candidate, data, time.perf_counter() - start))
+
+            codec, data = self.__pick_codec(results)
+            encodes_since_probe = 0
+        else:
+            data = self.__save_image(image, codec[1], **codec[2])
+
+        self.__codec_choices[kind] = (codec, encodes_since_probe + 1)
+        self.image_codec = codec[0]
+        self.image_content_type = "image/{}".format(codec[1].lower())
+
+        return data
+
+    def __pick_codec(self, results):
+        """
+        Picks the smallest encoding that fits in a frame at the target FPS, or the fastest one if none do.
+        """
+        frame_budget = 1.0 / max(self.options.browser.target_fps, 1)
+        within_budget = [result for result in results if result[2] <= frame_budget]
+
+        if within_budget:
+            codec, data, _elapsed = min(
+                within_budget, key=lambda result: len(result[1])
             )
-            self.image = bytesIO.getvalue()
+        else:
+            codec, data, _elapsed = min(results, key=lambda result: result[2])
+
+        return codec, data
+
+    def __get_palette_frame(self, pixels):
+        """
+        Returns the frame as (indices, palette) if it has few enough colors to be indexed, otherwise None.
+        """
+        packed = (
+            (pixels[..., 0].astype(np.uint32) << 16)
+            | (pixels[..., 1].astype(np.uint32) << 8)
+            | pixels[..., 2]
+        )
+        colors, indices = np.unique(packed, return_inverse=True)
+
+        # Black sorts first when present; otherwise add it, since the LED mask needs it at index 0
+        if colors[0] != 0:
+            colors = np.insert(colors, 0, 0)
+            indices = indices + 1
+
+        if len(colors) > self.PALETTE_MAX_COLORS:
+            return None
+
+        palette = np.stack(
+            [(colors >> 16) & 0xFF, (colors >> 8) & 0xFF, colors & 0xFF], axis=1
+        ).astype(np.uint8)
+
+        return (
+            indices.reshape(self.height, self.width).astype(np.uint8),
+            palette.tobytes(),
+        )
+
+    def __encode_raw_frame(self, pixels):
+        """
+        Packs the LED-resolution frame as a header followed by zlib-compressed RGB bytes.
+
+        The browser client handles upscaling and pixel masking itself.
+        """
+        header = self.RAW_FRAME_HEADER.pack(self.RAW_KEYFRAME, self.width, self.height)
+
+        return header + zlib.compress(pixels.tobytes())
+
+    def __select_delta_frame(self, pixels, keyframe, dirty_rects=None):
+        """
+        Returns a delta frame against the previous frame, or the keyframe when one is due or would be smaller.
+        """
+        previous, self.__previous_pixels = self.__previous_pixels, pixels
+
+        if (
+            previous is not None
+            and self.__frames_since_keyframe < self.options.browser.keyframe_interval
+        ):
+            delta = self.__encode_delta_frame(previous, pixels, dirty_rects)
+
+            if len(delta) < len(keyframe):
+                self.__frames_since_keyframe += 1
+                self.delta_frames += 1
+
+                return delta
+
+        self.__frames_since_keyframe = 0
+
+        return keyframe
+
+    def __encode_delta_frame(self, previous, pixels, dirty_rects=None):
+        """
+        Packs only the rectangles that changed since the previous frame.
+
+        Rectangles carry absolute pixel values, so applying one to a newer frame than it was computed against is harmless.
+        """
+        chunks = []
+        for x, y, width, height in self.__changed_rects(previous, pixels, dirty_rects):
+            chunks.append(self.DELTA_RECT_HEADER.pack(x, y, width, height))
+            chunks.append(pixels[y : y + height, x : x + width].tobytes())
+
+        header = self.RAW_FRAME_HEADER.pack(
+            self.RAW_DELTA_FRAME, self.width, self.height
+        )
+
+        return header + zlib.compress(b"".join(chunks))
+
+    def __changed_rects(self, previous, pixels, dirty_rects=None):
+        """
+        Finds changed tiles between two frames and merges horizontal runs of them into rectangles.
+
+        If the dirty regions are known, only those are compared.
+        """
+        tile = self.DELTA_TILE_SIZE
+        rows = -(-self.height // tile)
+        cols = -(-self.width // tile)
+
+        changed = np.zeros((rows * tile, cols * tile), dtype=bool)
+        if dirty_rects is None:
+            dirty_rects = [(0, 0, self.width, self.height)]
+
+        for x, y, width, height in dirty_rects:
+            region = (slice(y, y + height), slice(x, x + width))
+            changed[region] |= np.any(previous[region] != pixels[region], axis=2)
+        changed_tiles = changed.reshape(rows, tile, cols, tile).any(axis=(1, 3))
+
+        rects = []
+        for row in np.flatnonzero(changed_tiles.any(axis=1)):
+            changed_cols = np.flatnonzero(changed_tiles[row])
+            runs = np.split(
+                changed_cols, np.flatnonzero(np.diff(changed_cols) != 1) + 1
+            )
+
+            y = row * tile
+            height = min(y + tile, self.height) - y
+            for run in runs:
+                x = run[0] * tile
+                width = min((run[-1] + 1) * tile, self.width) - x
+                rects.append((int(x), int(y), int(width), int(height)))
+
+        return rects
+
+    def stats(self):
+        if self.__frame_buffer is not None:
+            # The render loop runs in another process, which shares its timings through the frame buffer
+            render_stats = self.__frame_buffer.stats()
+        else:
+            render_stats = {
+                **self.vsync.stats(),
+                "handoff_time_ms": self.handoff_time,
+                "render_time_ms": self.render_time,
+            }
+
+        return {
+            **render_stats,
+            "encoded_frames": self.encoded_frames,
+            "skipped_encodes": self.skipped_encodes,
+            "dropped_frames": self.dropped_frames,
+            "delta_frames": self.delta_frames,
+            "image_codec": self.image_codec,
+            "encode_time_ms": self.encode_time,
+        }
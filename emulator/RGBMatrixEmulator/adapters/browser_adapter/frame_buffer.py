@@ -0,0 +1,104 @@
+import numpy as np
+
+from multiprocessing import shared_memory
+
+
+class SharedFrameBuffer:
+    """
+    Double-buffered LED frame in shared memory, written by the render process and read by the display server process.
+
+    This is a seqlock over two slots. The writer announces the sequence number it is about to write, fills that
+    sequence's slot and then publishes it, so it never waits on the reader. The reader copies the slot for the
+    published sequence number and retries if, by the end of the copy, the writer had started on the next frame for
+    the same slot. Every frame is copied twice: into shared memory by the writer and back out by the reader.
+    """
+
+    SLOTS = 2
+
+    # Header is the published and in-progress frame sequence numbers, followed by the render process' timing stats
+    STATS = ["handoff_time_ms", "fps", "frame_time_ms", "jitter_ms", "render_time_ms"]
+    HEADER_SIZE = 8 * (2 + len(STATS))
+
+    def __init__(self, width, height, name=None):
+        self.shape = (height, width, 3)
+        self.frame_size = width * height * 3
+        self.owner = name is None
+
+        if self.owner:
+            self.memory = shared_memory.SharedMemory(
+                create=True, size=self.HEADER_SIZE + self.frame_size * self.SLOTS
+            )
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+
+        self.name = self.memory.name
+
+        self.__sequence = np.ndarray((1,), dtype=np.uint64, buffer=self.memory.buf)
+        self.__writing = np.ndarray(
+            (1,), dtype=np.uint64, buffer=self.memory.buf, offset=8
+        )
+        self.__stats = np.ndarray(
+            (len(self.STATS),), dtype=np.float64, buffer=self.memory.buf, offset=16
+        )
+        self.__slots = [
+            np.ndarray(
+                self.shape,
+                dtype=np.uint8,
+                buffer=self.memory.buf,
+                offset=self.HEADER_SIZE + self.frame_size * slot,
+            )
+            for slot in range(self.SLOTS)
+        ]
+
+        if self.owner:
+            self.__sequence[0] = 0
+            self.__writing[0] = 0
+            self.__stats[:] = np.nan
+
+    @property
+    def sequence(self):
+        return int(self.__sequence[0])
+
+    def write(self, pixels, stats=None):
+        """
+        Publishes a frame and returns its sequence number. Only one process may write.
+        """
+        stats = stats or {}
+        sequence = self.sequence + 1
+
+        # Readers still copying the frame that used this slot see this and retry
+        self.__writing[0] = sequence
+        np.copyto(self.__slots[sequence % self.SLOTS], pixels, casting="unsafe")
+        for index, key in enumerate(self.STATS):
+            value = stats.get(key)
+            self.__stats[index] = np.nan if value is None else value
+
+        self.__sequence[0] = sequence
+
+        return sequence
+
+    def read(self, out):
+        """
+        Copies the latest published frame into `out` and returns its sequence number.
+        """
+        while True:
+            sequence = self.sequence
+            np.copyto(out, self.__slots[sequence % self.SLOTS])
+
+            # The slot is only rewritten two frames later, so the copy is intact unless the writer started that one
+            if int(self.__writing[0]) - sequence < self.SLOTS:
+                return sequence
+
+    def stats(self):
+        return {
+            key: None if np.isnan(value) else float(value)
+            for key, value in zip(self.STATS, self.__stats)
+        }
+
+    def close(self):
+        # Drop our views before closing, otherwise the shared buffer can't be released
+        self.__sequence = self.__writing = self.__stats = self.__slots = None
+        self.memory.close()
+
+        if self.owner:
+            self.memory.unlink()
@@ -0,0 +1,135 @@
+import math
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+
+# Bucket boundaries sized for per-frame work at typical frame rates (seconds), encoded frames (bytes), and how many
+# frames a client falls behind over its connection
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.04, 0.08, 0.16, 0.32, 0.64)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+DROPPED_FRAME_BUCKETS = (0, 1, 5, 25, 100, 500, 2500)
+
+
+class PipelineMetrics:
+    """
+    Prometheus metrics for each stage of getting a frame from the script to the browser, labelled by matrix name.
+
+    Metrics live in their own registry, so they never clash with metrics from the application being emulated.
+    """
+
+    INSTANCE = None
+
+    def __init__(self):
+        self.registry = prometheus_client.CollectorRegistry()
+
+        self.render_time = prometheus_client.Histogram(
+            "rgbme_frame_render_seconds",
+            "Time the script spent drawing a frame, between one SwapOnVSync returning and the next call",
+            ["matrix"],
+            buckets=TIME_BUCKETS,
+            registry=self.registry,
+        )
+        self.masked_image_time = prometheus_client.Histogram(
+            "rgbme_masked_image_seconds",
+            "Time spent upscaling a frame and applying the LED mask",
+            ["matrix"],
+            buckets=TIME_BUCKETS,
+            registry=self.registry,
+        )
+        self.encode_time = prometheus_client.Histogram(
+            "rgbme_encode_seconds",
+            "Time spent encoding a frame, including masking",
+            ["matrix"],
+            buckets=TIME_BUCKETS,
+            registry=self.registry,
+        )
+        self.encoded_bytes = prometheus_client.Histogram(
+            "rgbme_encoded_bytes",
+            "Size of each encoded frame sent to clients",
+            ["matrix"],
+            buckets=BYTE_BUCKETS,
+            registry=self.registry,
+        )
+        self.websocket_send_time = prometheus_client.Histogram(
+            "rgbme_websocket_send_seconds",
+            "Time from writing a frame to a WebSocket until it was flushed to the client",
+            ["matrix"],
+            buckets=TIME_BUCKETS,
+            registry=self.registry,
+        )
+        self.client_dropped_frames = prometheus_client.Histogram(
+            "rgbme_client_dropped_frames",
+            "Frames each WebSocket client skipped because it couldn't keep up, observed when it disconnects",
+            ["matrix"],
+            buckets=DROPPED_FRAME_BUCKETS,
+            registry=self.registry,
+        )
+        self.dropped_frames = prometheus_client.Counter(
+            "rgbme_dropped_frames",
+            "Frames replaced by a newer one before the encoder or a WebSocket client got to them",
+            ["matrix", "stage"],
+            registry=self.registry,
+        )
+        self.connected_clients = prometheus_client.Gauge(
+            "rgbme_connected_clients",
+            "Connected WebSocket and multipart stream clients",
+            ["matrix", "transport"],
+            registry=self.registry,
+        )
+        self.fps = prometheus_client.Gauge(
+            "rgbme_fps",
+            "Rate at which the script is swapping frames",
+            ["matrix"],
+            registry=self.registry,
+        )
+
+    @classmethod
+    def instance(cls):
+        """
+        Returns the process's metrics, or None if prometheus_client isn't installed.
+        """
+        if prometheus_client is None:
+            return None
+
+        if cls.INSTANCE is None:
+            cls.INSTANCE = cls()
+
+        return cls.INSTANCE
+
+    def for_matrix(self, adapter):
+        return MatrixMetrics(self, adapter)
+
+
+class MatrixMetrics:
+    """
+    A matrix's labelled metrics, looked up once so that recording them on every frame stays cheap.
+    """
+
+    def __init__(self, pipeline_metrics, adapter):
+        name = adapter.options.name
+
+        self.registry = pipeline_metrics.registry
+        self.render_time = pipeline_metrics.render_time.labels(name)
+        self.masked_image_time = pipeline_metrics.masked_image_time.labels(name)
+        self.encode_time = pipeline_metrics.encode_time.labels(name)
+        self.encoded_bytes = pipeline_metrics.encoded_bytes.labels(name)
+        self.websocket_send_time = pipeline_metrics.websocket_send_time.labels(name)
+        self.client_dropped_frames = pipeline_metrics.client_dropped_frames.labels(name)
+        self.encoder_dropped_frames = pipeline_metrics.dropped_frames.labels(
+            name, "encoder"
+        )
+        self.websocket_dropped_frames = pipeline_metrics.dropped_frames.labels(
+            name, "websocket"
+        )
+        self.websocket_clients = pipeline_metrics.connected_clients.labels(
+            name, "websocket"
+        )
+        self.stream_clients = pipeline_metrics.connected_clients.labels(name, "stream")
+
+        # Read from the adapter's own stats at scrape time, so there's nothing to update per frame
+        pipeline_metrics.fps.labels(name).set_function(
+            lambda: adapter.stats()["fps"] or math.nan
+        )
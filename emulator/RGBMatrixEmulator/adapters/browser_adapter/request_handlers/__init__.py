@@ -2,6 +2,15 @@ from RGBMatrixEmulator.adapters.browser_adapter.request_handlers.main import Mai
 from RGBMatrixEmulator.adapters.browser_adapter.request_handlers.image import (
     ImageHandler,
 )
+from RGBMatrixEmulator.adapters.browser_adapter.request_handlers.image_stream import (
+    ImageStreamHandler,
+)
 from RGBMatrixEmulator.adapters.browser_adapter.request_handlers.image_web_socket import (
     ImageWebSocketHandler,
 )
+from RGBMatrixEmulator.adapters.browser_adapter.request_handlers.stats import (
+    StatsHandler,
+)
+from RGBMatrixEmulator.adapters.browser_adapter.request_handlers.metrics import (
+    MetricsHandler,
+)
@@ -1,12 +1,39 @@
+import tornado.ioloop
 import tornado.web
 
 
 class ImageHandler(tornado.web.RequestHandler):
-    def get(self):
-        self.set_header(
-            "Content-type", "image/{}".format(self.adapter.image_format.lower())
-        )
-        self.write(self.adapter.image)
-
-    def register_adapter(adapter):
-        ImageHandler.adapter = adapter
+    def initialize(self, matrix):
+        self.adapter = matrix.adapter
+
+    async def get(self):
+        # Read the ETag first so that a racing frame update can only make it stale, never ahead of the image
+        self.frame_etag = self.adapter.etag
+
+        # Clients may cache the image but must revalidate it, which is cheap thanks to the ETag
+        self.set_header("Cache-Control", "no-cache")
+
+        if self.frame_etag is not None:
+            self.set_etag_header()
+
+            if self.check_etag_header():
+                self.set_status(304)
+                return
+
+        # The codec can change per frame with the "auto" image format, so read it after the image
+        image = await read_image(self.adapter)
+        self.set_header("Content-type", self.adapter.image_content_type)
+        self.write(image)
+
+    def compute_etag(self):
+        return self.frame_etag
+
+
+async def read_image(adapter):
+    """
+    Returns the adapter's current image. With the raw and delta transports the image is only encoded when it's
+    first asked for, which takes long enough to stall every other client, so it's read off the IOLoop.
+    """
+    return await tornado.ioloop.IOLoop.current().run_in_executor(
+        None, lambda: adapter.image
+    )
@@ -0,0 +1,71 @@
+import tornado.iostream
+import tornado.web
+
+from RGBMatrixEmulator.adapters.browser_adapter.request_handlers.image import read_image
+
+
+class ImageStreamHandler(tornado.web.RequestHandler):
+    """
+    Streams frames as multipart/x-mixed-replace (MJPEG-style) parts, writing a new part only when the frame changes.
+    """
+
+    BOUNDARY = "rgbmeframe"
+
+    def initialize(self, matrix):
+        self.matrix = matrix
+        self.adapter = matrix.adapter
+
+    async def get(self):
+        self.closed = False
+        self.set_header(
+            "Content-Type",
+            "multipart/x-mixed-replace; boundary={}".format(self.BOUNDARY),
+        )
+        self.set_header("Cache-Control", "no-cache, no-store")
+
+        metrics = self.adapter.metrics
+        if metrics is not None:
+            metrics.stream_clients.inc()
+
+        try:
+            await self.stream_frames()
+        finally:
+            if metrics is not None:
+                metrics.stream_clients.dec()
+
+    async def stream_frames(self):
+        etag = None
+        while not self.closed:
+            if self.adapter.etag != etag:
+                # Always send the latest frame, so slow clients skip stale frames rather than queue them
+                etag = self.adapter.etag
+                image = await read_image(self.adapter)
+
+                self.write(
+                    "--{}\r\nContent-Type: {}\r\nContent-Length: {}\r\n\r\n".format(
+                        self.BOUNDARY,
+                        self.adapter.image_content_type,
+                        len(image),
+                    )
+                )
+                self.write(image)
+                self.write("\r\n")
+
+                try:
+                    await self.flush()
+                except tornado.iostream.StreamClosedError:
+                    return
+
+                continue
+
+            await self.matrix.new_frame.wait()
+
+    def on_connection_close(self):
+        self.closed = True
+        self.matrix.new_frame.notify_all()
+
+    def broadcast(matrix):
+        """
+        Wakes a matrix's streams to send its newly encoded frame. Must be called on the server's IOLoop.
+        """
+        matrix.new_frame.notify_all()
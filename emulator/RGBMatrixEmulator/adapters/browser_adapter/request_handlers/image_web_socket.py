@@ -1,34 +1,109 @@
+import time
+
 import tornado.websocket
 
 from RGBMatrixEmulator.logger import Logger
 
 
 class ImageWebSocketHandler(tornado.websocket.WebSocketHandler):
-    clients = set()
-    adapter = None
+    def initialize(self, matrix):
+        self.matrix = matrix
+        self.adapter = matrix.adapter
 
     def check_origin(self, _origin):
         # Allow access from every origin
         return True
 
     def open(self):
-        ImageWebSocketHandler.clients.add(self)
+        self.sending = False
+        self.pending_frame = None
+        self.dropped_frames = 0
+
+        self.matrix.clients.add(self)
+        if self.adapter.metrics is not None:
+            self.adapter.metrics.websocket_clients.inc()
+
         Logger.info("WebSocket opened from: " + self.request.remote_ip)
 
+        # Pushed frames are only sent when they change, so new clients need the current frame right away
+        if self.adapter.options.browser.push_frames:
+            keyframe = self.adapter.keyframe
+            if keyframe:
+                self.send_frame(keyframe, keyframe)
+
     def on_message(self, _message):
-        if not ImageWebSocketHandler.adapter.image:
+        if not self.adapter.keyframe:
             Logger.warning(
-                "No image received from {}!".format(
-                    ImageWebSocketHandler.adapter.__class__.__name__
-                )
+                "No image received from {}!".format(self.adapter.__class__.__name__)
             )
             return
 
-        image_bytes = ImageWebSocketHandler.adapter.image
-        self.write_message(image_bytes, binary=True)
+        # Clients that poll may have missed frames in between, so always reply with a full frame
+        frame_bytes = self.adapter.keyframe
+        self.write_message(frame_bytes, binary=True)
 
     def on_close(self):
-        ImageWebSocketHandler.clients.remove(self)
+        if self in self.matrix.clients and self.adapter.metrics is not None:
+            self.adapter.metrics.websocket_clients.dec()
+            self.adapter.metrics.client_dropped_frames.observe(self.dropped_frames)
+
+        self.matrix.clients.discard(self)
+
+    def send_frame(self, frame_bytes, keyframe_bytes):
+        """
+        Sends a frame to this client, applying backpressure if the previous frame hasn't been flushed yet.
+
+        Only the newest waiting frame is kept, so slow clients skip stale frames instead of falling behind.
+        Once a frame is skipped, a delta against it is useless, so the matching keyframe is queued instead.
+        """
+        if self.sending:
+            if self.pending_frame is not None:
+                self.dropped_frames += 1
+                if self.adapter.metrics is not None:
+                    self.adapter.metrics.websocket_dropped_frames.inc()
+
+                frame_bytes = keyframe_bytes
+
+            self.pending_frame = frame_bytes
+            return
+
+        self.sending = True
+        self.send_started = time.perf_counter()
+
+        try:
+            future = self.write_message(frame_bytes, binary=True)
+        except tornado.websocket.WebSocketClosedError:
+            return
+
+        future.add_done_callback(self.__on_frame_sent)
+
+    def __on_frame_sent(self, future):
+        self.sending = False
+
+        if future.exception() is not None:
+            return
+
+        if self.adapter.metrics is not None:
+            self.adapter.metrics.websocket_send_time.observe(
+                time.perf_counter() - self.send_started
+            )
+
+        if self.pending_frame is not None:
+            frame_bytes, self.pending_frame = self.pending_frame, None
+            self.send_frame(frame_bytes, frame_bytes)
+
+    def broadcast(matrix, frame_bytes, keyframe_bytes):
+        """
+        Pushes a newly encoded frame to every client of a matrix. Must be called on the server's IOLoop.
+        """
+        for client in list(matrix.clients):
+            client.send_frame(frame_bytes, keyframe_bytes)
 
-    def register_adapter(adapter):
-        ImageWebSocketHandler.adapter = adapter
+    def client_stats(matrix):
+        return [
+            {
+                "remote_ip": client.request.remote_ip,
+                "dropped_frames": client.dropped_frames,
+            }
+            for client in matrix.clients
+        ]
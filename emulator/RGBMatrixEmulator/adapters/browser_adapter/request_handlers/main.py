@@ -2,8 +2,18 @@ import tornado.web
 
 
 class MainHandler(tornado.web.RequestHandler):
+    def initialize(self, server, name):
+        self.server = server
+        self.name = name
+
     def get(self):
-        self.render("./../static/index.html", adapter=MainHandler.adapter)
+        matrix = self.server.matrices.get(self.name)
+        if matrix is not None:
+            self.render("./../static/index.html", adapter=matrix.adapter)
+            return
+
+        # Without a default matrix, the root page links to the named ones
+        if self.name or not self.server.matrices:
+            raise tornado.web.HTTPError(404)
 
-    def register_adapter(adapter):
-        MainHandler.adapter = adapter
+        self.render("./../static/matrices.html", matrices=self.server.matrices)
@@ -0,0 +1,13 @@
+import tornado.web
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    def initialize(self, registry):
+        self.registry = registry
+
+    def get(self):
+        # Only imported once metrics are enabled, since prometheus_client is optional
+        import prometheus_client
+
+        self.set_header("Content-Type", prometheus_client.CONTENT_TYPE_LATEST)
+        self.write(prometheus_client.generate_latest(self.registry))
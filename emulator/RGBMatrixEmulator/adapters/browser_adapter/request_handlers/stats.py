@@ -0,0 +1,17 @@
+import tornado.web
+
+from RGBMatrixEmulator.adapters.browser_adapter.request_handlers.image_web_socket import (
+    ImageWebSocketHandler,
+)
+
+
+class StatsHandler(tornado.web.RequestHandler):
+    def initialize(self, matrix):
+        self.matrix = matrix
+
+    def get(self):
+        self.set_header("Cache-Control", "no-store")
+        stats = self.matrix.adapter.stats()
+        stats["clients"] = ImageWebSocketHandler.client_stats(self.matrix)
+
+        self.write(stats)
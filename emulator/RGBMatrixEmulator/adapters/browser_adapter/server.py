@@ -1,9 +1,13 @@
 import asyncio
+import re
 import signal
 import sys
 import threading
-import tornado.web
+import tornado.httpserver
 import tornado.ioloop
+import tornado.locks
+import tornado.netutil
+import tornado.web
 
 from os import path
 from tornado.platform.asyncio import AnyThreadEventLoopPolicy
@@ -14,73 +18,218 @@ from RGBMatrixEmulator.logger import Logger
 
 asyncio.set_event_loop_policy(AnyThreadEventLoopPolicy())
 
+ASSET_PATH = path.normpath(path.dirname(path.realpath(__file__)) + "/static/assets/")
+
+# Named matrices are served under "/<name>/", so names must be usable as a single URL path segment
+MATRIX_NAME = re.compile(r"^[A-Za-z0-9_\-]+$")
+RESERVED_NAMES = ["assets", "metrics"]
+
+
+class ServedMatrix:
+    """
+    A matrix served by a `Server`, along with the clients watching it.
+    """
+
+    def __init__(self, adapter):
+        self.adapter = adapter
+        self.name = adapter.options.name
+        self.prefix = "/{}/".format(self.name) if self.name else "/"
+
+        # Open websockets, and a condition that wakes multipart streams when a new frame is encoded
+        self.clients = set()
+        self.new_frame = tornado.locks.Condition()
+
 
 class Server:
-    instance = None
-
-    # Singleton class for the server.
-    # No more than one webserver can be running at a given time.
-    class __Singleton:
-        def __init__(self, adapter):
-            self.adapter = adapter
-            self.io_loop = None
-            self.listening = False
-
-            MainHandler.register_adapter(self.adapter)
-            ImageWebSocketHandler.register_adapter(self.adapter)
-            ImageHandler.register_adapter(self.adapter)
-
-            script_path = path.dirname(path.realpath(__file__))
-            asset_path = path.normpath(script_path + "/static/assets/")
-
-            self.app = tornado.web.Application(
-                [
-                    (r"/websocket", ImageWebSocketHandler),
-                    (r"/image", ImageHandler),
-                    (r"/", MainHandler),
-                    (
-                        r"/assets/(.*)",
-                        tornado.web.StaticFileHandler,
-                        {"path": asset_path, "default_filename": "client.js"},
-                    ),
-                ]
+    """
+    Serves every browser-adapted matrix in the process that uses the same port.
+
+    Matrices on a port share one web server, and all servers share one IOLoop thread. The default (unnamed) matrix
+    is served at "/", and each named matrix under "/<name>/". Each matrix still has its own encoder, so one busy sign
+    doesn't hold up the others.
+    """
+
+    # Servers keyed by port
+    SERVERS = {}
+    SERVERS_LOCK = threading.Lock()
+    IO_LOOP = None
+
+    def __init__(self, port):
+        self.port = port
+        self.listening = False
+        # Read by request handlers, so only changed on the IOLoop thread once the server is listening
+        self.matrices = {}
+        # Names claimed by add_matrix, which can run on any thread
+        self.names = set()
+        self.serving_metrics = False
+        self.lock = threading.Lock()
+
+        self.app = tornado.web.Application(
+            [
+                (r"/", MainHandler, {"server": self, "name": ""}),
+                (
+                    r"/assets/(.*)",
+                    tornado.web.StaticFileHandler,
+                    {"path": ASSET_PATH, "default_filename": "client.js"},
+                ),
+            ]
+        )
+
+    @property
+    def io_loop(self):
+        return Server.IO_LOOP if self.listening else None
+
+    @classmethod
+    def get(cls, port):
+        with cls.SERVERS_LOCK:
+            if port not in cls.SERVERS:
+                cls.SERVERS[port] = cls(port)
+
+            return cls.SERVERS[port]
+
+    def add_matrix(self, adapter):
+        """
+        Starts serving a matrix at its URL path. Returns the `ServedMatrix` to broadcast its frames to.
+        """
+        name = adapter.options.name
+        if name and (not MATRIX_NAME.match(name) or name in RESERVED_NAMES):
+            raise ValueError(
+                'Invalid matrix name "{}". Names may only contain letters, digits, "-" and "_", and can\'t be {}.'.format(
+                    name,
+                    " or ".join('"{}"'.format(reserved) for reserved in RESERVED_NAMES),
+                )
             )
 
-    def __init__(self, adapter):
-        if not Server.instance:
-            Server.instance = Server.__Singleton(adapter)
+        matrix = ServedMatrix(adapter)
+
+        prefix = re.escape(matrix.prefix)
+        handlers = [
+            (prefix + "websocket", ImageWebSocketHandler, {"matrix": matrix}),
+            (prefix + "image", ImageHandler, {"matrix": matrix}),
+            (prefix + "stream", ImageStreamHandler, {"matrix": matrix}),
+            (prefix + "stats", StatsHandler, {"matrix": matrix}),
+        ]
+
+        if name:
+            handlers += [
+                (prefix + "?", MainHandler, {"server": self, "name": name}),
+                (
+                    prefix + "assets/(.*)",
+                    tornado.web.StaticFileHandler,
+                    {"path": ASSET_PATH, "default_filename": "client.js"},
+                ),
+            ]
+
+        with self.lock:
+            if name in self.names:
+                raise ValueError(
+                    'A matrix named "{}" is already being served on port {}'.format(
+                        name, self.port
+                    )
+                )
+
+            self.names.add(name)
+
+            # Metrics for every matrix on the port are served together, labelled by matrix name
+            if adapter.metrics is not None and not self.serving_metrics:
+                handlers.append(
+                    (
+                        r"/metrics",
+                        MetricsHandler,
+                        {"registry": adapter.metrics.registry},
+                    )
+                )
+                self.serving_metrics = True
+
+            # Handlers can be added while the server is running, but the IOLoop thread may be routing a request
+            if self.listening:
+                Server.IO_LOOP.add_callback(self.__add_routes, name, matrix, handlers)
+                Logger.info(
+                    "Serving matrix on http://0.0.0.0:{}{}".format(
+                        self.port, matrix.prefix
+                    )
+                )
+            else:
+                self.__add_routes(name, matrix, handlers)
+
+        return matrix
+
+    def __add_routes(self, name, matrix, handlers):
+        self.matrices[name] = matrix
+        self.app.wildcard_router.add_rules(handlers)
 
     def run(self):
-        if not self.instance.listening:
+        with self.lock:
+            if self.listening:
+                return
+
             Logger.info("Starting server...")
 
-            self.instance.listening = True
-            self.instance.app.listen(self.instance.adapter.options.browser.port, address="0.0.0.0")
-            self.instance.io_loop = tornado.ioloop.IOLoop.current()
-            thread = threading.Thread(
-                target=self.instance.io_loop.start,
-                name="RGBMEServerThread",
-                daemon=True,
-            )
-            self.__initialize_interrupts()
-            thread.start()
+            # Bind here rather than on the IOLoop thread, so errors like the port being in use reach the caller
+            sockets = tornado.netutil.bind_sockets(self.port, address="0.0.0.0")
+            http_server = tornado.httpserver.HTTPServer(self.app)
+            Server.start_io_loop().add_callback(http_server.add_sockets, sockets)
+            self.listening = True
 
             Logger.info(
-                "Server started and ready to accept requests on http://0.0.0.0:"
-                + str(self.instance.adapter.options.browser.port)
-                + "/"
+                "Server started and ready to accept requests on "
+                + ", ".join(
+                    "http://0.0.0.0:{}{}".format(self.port, matrix.prefix)
+                    for matrix in self.matrices.values()
+                )
             )
 
-    def __initialize_interrupts(self):
+    @classmethod
+    def start_io_loop(cls):
+        """
+        Returns the IOLoop shared by all servers, starting its thread the first time.
+        """
+        with cls.SERVERS_LOCK:
+            if cls.IO_LOOP is None:
+                started = threading.Event()
+
+                def run_io_loop():
+                    asyncio.set_event_loop(asyncio.new_event_loop())
+                    cls.IO_LOOP = tornado.ioloop.IOLoop.current()
+                    started.set()
+                    cls.IO_LOOP.start()
+
+                threading.Thread(
+                    target=run_io_loop, name="RGBMEServerThread", daemon=True
+                ).start()
+                started.wait()
+
+                cls.__initialize_interrupts()
+
+            return cls.IO_LOOP
+
+    def broadcast(self, matrix, frame_bytes, keyframe_bytes):
+        """
+        Schedules a newly encoded frame to be pushed to a matrix's clients. Safe to call from any thread.
+        """
+        if self.io_loop is None:
+            return
+
+        self.io_loop.add_callback(self.__broadcast, matrix, frame_bytes, keyframe_bytes)
+
+    def __broadcast(self, matrix, frame_bytes, keyframe_bytes):
+        if matrix.adapter.options.browser.push_frames:
+            ImageWebSocketHandler.broadcast(matrix, frame_bytes, keyframe_bytes)
+
+        ImageStreamHandler.broadcast(matrix)
+
+    @classmethod
+    def __initialize_interrupts(cls):
         """
         Add custom signal handling to ensure webserver thread exits appropriately.
 
         Not thread-safe, signal handling must happen on the main thread.
         """
         if threading.current_thread() is threading.main_thread():
-            signal.signal(signal.SIGINT, self.__kill)
-            signal.signal(signal.SIGTERM, self.__kill)
+            signal.signal(signal.SIGINT, cls.__kill)
+            signal.signal(signal.SIGTERM, cls.__kill)
 
-    def __kill(self, *_args):
-        self.instance.io_loop.add_callback(self.instance.io_loop.stop)
+    @classmethod
+    def __kill(cls, *_args):
+        cls.IO_LOOP.add_callback(cls.IO_LOOP.stop)
         sys.exit()
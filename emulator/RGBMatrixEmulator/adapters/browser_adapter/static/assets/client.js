@@ -1,10 +1,27 @@
 function init() {
-    const WS_RETRY_DELAY = 2000;
-    const FPS_DEFAULT    = 24;
+    const WS_RETRY_DELAY  = 2000;
+    const FPS_DEFAULT     = 24;
+    const RAW_HEADER_SIZE = 5;
+    const RAW_KEYFRAME    = 0;
+    const RAW_DELTA_FRAME = 1;
+    const DELTA_RECT_SIZE = 8;
 
     let img       = document.getElementById("liveImg");
+    let canvas    = document.getElementById("liveCanvas");
     let fpsText   = document.getElementById("fps");
     let fpsTarget = parseInt(document.getElementById("targetFps").value) || FPS_DEFAULT;
+    let pushFrames = document.getElementById("pushFrames").value === "True";
+    let transport  = document.getElementById("transport").value;
+    let pixelSize  = parseInt(document.getElementById("pixelSize").value) || 1;
+    let pixelStyle = document.getElementById("pixelStyle").value;
+
+    // Raw frames are decoded into an LED-resolution framebuffer, then upscaled onto the visible canvas.
+    let context     = canvas ? canvas.getContext("2d") : null;
+    let ledCanvas   = document.createElement("canvas");
+    let ledContext  = ledCanvas.getContext("2d");
+    let ledImage    = null;
+    let maskPattern = null;
+    let renderQueue = Promise.resolve();
 
     let requestStartTime = performance.now();
     let startTime = performance.now();
@@ -21,6 +38,127 @@ function init() {
         socket.send('more');
     }
 
+    function drawImageFrame(arrayBuffer) {
+        let blob  = new Blob([new Uint8Array(arrayBuffer)], {type: "image/jpeg"});
+        let old_img = img.src.slice()
+        img.src   = window.URL.createObjectURL(blob);
+        window.URL.revokeObjectURL(old_img);
+    }
+
+    async function inflate(bytes) {
+        let stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("deflate"));
+
+        return new Uint8Array(await new Response(stream).arrayBuffer());
+    }
+
+    function createMaskPattern() {
+        // Square LEDs fill their whole cell, so only circles need masking.
+        if (pixelStyle !== "circle") {
+            return null;
+        }
+
+        let cell = document.createElement("canvas");
+        cell.width = pixelSize;
+        cell.height = pixelSize;
+
+        let cellContext = cell.getContext("2d");
+        cellContext.fillStyle = "black";
+        cellContext.fillRect(0, 0, pixelSize, pixelSize);
+        cellContext.globalCompositeOperation = "destination-out";
+        cellContext.beginPath();
+        cellContext.arc(pixelSize / 2, pixelSize / 2, pixelSize / 2, 0, 2 * Math.PI);
+        cellContext.fill();
+
+        return context.createPattern(cell, "repeat");
+    }
+
+    function resizeFramebuffer(width, height) {
+        ledCanvas.width = width;
+        ledCanvas.height = height;
+        ledImage = ledContext.createImageData(width, height);
+
+        canvas.width = width * pixelSize;
+        canvas.height = height * pixelSize;
+        // Resizing a canvas resets its context, so this has to be set after every resize.
+        context.imageSmoothingEnabled = false;
+        maskPattern = createMaskPattern();
+    }
+
+    function presentFramebuffer() {
+        ledContext.putImageData(ledImage, 0, 0);
+        context.drawImage(ledCanvas, 0, 0, canvas.width, canvas.height);
+
+        if (maskPattern) {
+            context.fillStyle = maskPattern;
+            context.fillRect(0, 0, canvas.width, canvas.height);
+        }
+    }
+
+    function applyKeyframe(rgb) {
+        let rgba = ledImage.data;
+
+        for (let i = 0, j = 0; i < rgb.length; i += 3, j += 4) {
+            rgba[j]     = rgb[i];
+            rgba[j + 1] = rgb[i + 1];
+            rgba[j + 2] = rgb[i + 2];
+            rgba[j + 3] = 255;
+        }
+    }
+
+    function applyDeltaFrame(payload) {
+        let rgba   = ledImage.data;
+        let view   = new DataView(payload.buffer, payload.byteOffset, payload.byteLength);
+        let offset = 0;
+
+        // Each changed rectangle is a (x, y, width, height) header followed by its RGB bytes.
+        while (offset < payload.length) {
+            let x      = view.getUint16(offset);
+            let y      = view.getUint16(offset + 2);
+            let width  = view.getUint16(offset + 4);
+            let height = view.getUint16(offset + 6);
+            offset += DELTA_RECT_SIZE;
+
+            for (let row = y; row < y + height; row++) {
+                let j = (row * ledImage.width + x) * 4;
+
+                for (let col = 0; col < width; col++, offset += 3, j += 4) {
+                    rgba[j]     = payload[offset];
+                    rgba[j + 1] = payload[offset + 1];
+                    rgba[j + 2] = payload[offset + 2];
+                    rgba[j + 3] = 255;
+                }
+            }
+        }
+    }
+
+    async function drawRawFrame(arrayBuffer) {
+        let header    = new DataView(arrayBuffer, 0, RAW_HEADER_SIZE);
+        let frameType = header.getUint8(0);
+        let width     = header.getUint16(1);
+        let height    = header.getUint16(3);
+        let sizeChanged = !ledImage || ledCanvas.width !== width || ledCanvas.height !== height;
+
+        if (frameType === RAW_KEYFRAME) {
+            if (sizeChanged) {
+                resizeFramebuffer(width, height);
+            }
+
+            applyKeyframe(await inflate(new Uint8Array(arrayBuffer, RAW_HEADER_SIZE)));
+        } else if (frameType === RAW_DELTA_FRAME) {
+            // A delta can only patch a framebuffer that a keyframe has already filled.
+            if (sizeChanged) {
+                return;
+            }
+
+            applyDeltaFrame(await inflate(new Uint8Array(arrayBuffer, RAW_HEADER_SIZE)));
+        } else {
+            console.warn(`RGBME received unknown frame type ${frameType}.`);
+            return;
+        }
+
+        presentFramebuffer();
+    }
+
     function generateSocket() {
         let path = location.pathname;
 
@@ -40,7 +178,11 @@ function init() {
         ws.onopen = function() {
             console.log("RGBME WebSocket connection established!");
             startTime = performance.now();
-            requestImage();
+
+            // In push mode the server sends each new frame as soon as it is encoded.
+            if (!pushFrames) {
+                requestImage();
+            }
         };
 
         ws.onclose = function() {
@@ -58,10 +200,13 @@ function init() {
 
         ws.onmessage = function(evt) {
             let arrayBuffer = evt.data;
-            let blob  = new Blob([new Uint8Array(arrayBuffer)], {type: "image/jpeg"});
-            let old_img = img.src.slice()
-            img.src   = window.URL.createObjectURL(blob);
-            window.URL.revokeObjectURL(old_img);
+
+            if (transport === "raw") {
+                // Decompression is asynchronous, so queue frames to keep them in order.
+                renderQueue = renderQueue.then(() => drawRawFrame(arrayBuffer));
+            } else {
+                drawImageFrame(arrayBuffer);
+            }
 
             let endTime = performance.now();
             let currentTime = endTime - startTime;
@@ -74,6 +219,10 @@ function init() {
                 fpsText.textContent = fps;
             }
 
+            if (pushFrames) {
+                return;
+            }
+
             let currentRequestTime = performance.now() - requestStartTime;
             // smooth with moving average
             requestTime = (requestTime * requestTimeSmoothing) + (currentRequestTime * (1.0 - requestTimeSmoothing));
@@ -86,6 +235,8 @@ function init() {
     }
 
     console.log(`TARGET FPS: ${fpsTarget}`);
+    console.log(`PUSH FRAMES: ${pushFrames}`);
+    console.log(`TRANSPORT: ${transport}`);
 };
 
 init();
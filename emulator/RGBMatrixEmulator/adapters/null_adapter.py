@@ -0,0 +1,25 @@
+from RGBMatrixEmulator.adapters.base import BaseAdapter
+from RGBMatrixEmulator.logger import Logger
+
+
+class NullAdapter(BaseAdapter):
+    """
+    Discards every frame. Useful for measuring how fast a script can draw without any display overhead.
+    """
+
+    USES_MASKED_IMAGES = False
+
+    def __init__(self, width, height, options):
+        super().__init__(width, height, options)
+        self.frames = 0
+
+    def load_emulator_window(self):
+        if self.loaded:
+            return
+
+        Logger.info(self.emulator_details_text())
+
+        self.loaded = True
+
+    def draw_to_screen(self, pixels):
+        self.frames += 1
@@ -0,0 +1,198 @@
+import argparse
+import atexit
+import mmap
+import struct
+import time
+
+import numpy as np
+
+from RGBMatrixEmulator.adapters.base import BaseAdapter
+from RGBMatrixEmulator.logger import Logger
+
+# Recording files start with a header, followed by fixed-size records of a timestamp and the raw RGB frame
+RECORDING_MAGIC = b"RGBMEREC"
+RECORDING_VERSION = 1
+RECORDING_HEADER = struct.Struct("<8sHHHxxQ")
+FRAME_COUNT = struct.Struct("<Q")
+FRAME_COUNT_OFFSET = RECORDING_HEADER.size - FRAME_COUNT.size
+FRAME_TIME = struct.Struct("<d")
+
+
+def frame_record_dtype(width, height):
+    return np.dtype([("time", "<f8"), ("pixels", np.uint8, (height, width, 3))])
+
+
+class RecorderAdapter(BaseAdapter):
+    """
+    Appends every frame to a memory-mapped recording file, which can be replayed into any other adapter later.
+
+    The file grows in chunks, and its frame count is updated after each frame, so a recording stays readable even
+    if the process is killed.
+    """
+
+    USES_MASKED_IMAGES = False
+
+    INITIAL_CAPACITY = 256
+
+    def __init__(self, width, height, options):
+        super().__init__(width, height, options)
+        self.path = options.recorder.path
+        self.frames = 0
+        self.__record_size = frame_record_dtype(width, height).itemsize
+        self.__capacity = 0
+        self.__file = None
+        self.__map = None
+        self.__start = None
+
+    def load_emulator_window(self):
+        if self.loaded:
+            return
+
+        Logger.info(self.emulator_details_text())
+
+        self.__file = open(self.path, "w+b")
+        self.__file.write(
+            RECORDING_HEADER.pack(
+                RECORDING_MAGIC, RECORDING_VERSION, self.width, self.height, 0
+            )
+        )
+        self.__capacity = self.INITIAL_CAPACITY
+        self.__file.truncate(self.__offset(self.__capacity))
+        self.__map = mmap.mmap(self.__file.fileno(), 0)
+
+        atexit.register(self.close)
+
+        Logger.info("Recording frames to {}".format(self.path))
+
+        self.loaded = True
+
+    def draw_to_screen(self, pixels):
+        if self.__map is None:
+            return
+
+        now = time.perf_counter()
+        if self.__start is None:
+            self.__start = now
+
+        if self.frames == self.__capacity:
+            self.__capacity *= 2
+            self.__map.resize(self.__offset(self.__capacity))
+
+        offset = self.__offset(self.frames)
+        FRAME_TIME.pack_into(self.__map, offset, now - self.__start)
+        self.__map[offset + FRAME_TIME.size : offset + self.__record_size] = (
+            np.ascontiguousarray(pixels, dtype=np.uint8)
+        )
+
+        self.frames += 1
+        FRAME_COUNT.pack_into(self.__map, FRAME_COUNT_OFFSET, self.frames)
+
+    def close(self):
+        """
+        Trims unused capacity off the end of the recording and closes it.
+        """
+        if self.__map is None:
+            return
+
+        self.__map.resize(self.__offset(self.frames))
+        self.__map.close()
+        self.__file.close()
+        self.__map = None
+
+    def __offset(self, frame):
+        return RECORDING_HEADER.size + frame * self.__record_size
+
+
+class Recording:
+    """
+    Read-only view of a recording file. Frames are memory-mapped, so opening even a long recording is instant.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(RECORDING_HEADER.size)
+
+        magic, version, self.width, self.height, count = RECORDING_HEADER.unpack(header)
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            raise ValueError("{} is not an RGBMatrixEmulator recording".format(path))
+
+        self.records = np.memmap(
+            path,
+            dtype=frame_record_dtype(self.width, self.height),
+            mode="r",
+            offset=RECORDING_HEADER.size,
+            shape=(count,),
+        )
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records["pixels"][index]
+
+    @property
+    def times(self):
+        """
+        Seconds from the first frame at which each frame was presented.
+        """
+        return self.records["time"]
+
+    def replay(self, adapter, realtime=True):
+        """
+        Draws each frame to `adapter`. With `realtime`, frames are paced to their original timing.
+        """
+        start = time.perf_counter()
+
+        for frame_time, pixels in zip(self.times, self.records["pixels"]):
+            if realtime:
+                delay = frame_time - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            adapter.draw_to_screen(pixels)
+
+
+def main():
+    """
+    Replays a recording into a display adapter:
+
+        python -m RGBMatrixEmulator.adapters.recorder_adapter recording.rgbme --adapter browser
+    """
+    from RGBMatrixEmulator import RGBMatrixOptions
+    from RGBMatrixEmulator.adapters import load_adapter
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("path")
+    parser.add_argument(
+        "--adapter", help="Display adapter to replay into. Default: configured adapter"
+    )
+    parser.add_argument(
+        "--fast", action="store_true", help="Replay as fast as possible"
+    )
+    parser.add_argument("--loop", action="store_true", help="Replay until interrupted")
+    args = parser.parse_args()
+
+    recording = Recording(args.path)
+
+    options = RGBMatrixOptions()
+    options.cols, options.rows = recording.width, recording.height
+    options.chain_length = options.parallel = 1
+
+    adapter_class = options.display_adapter
+    if args.adapter:
+        adapter_class = load_adapter(args.adapter)
+        if adapter_class is None:
+            raise SystemExit('Unknown display adapter "{}"'.format(args.adapter))
+
+    adapter = adapter_class(recording.width, recording.height, options)
+    adapter.load_emulator_window()
+
+    while True:
+        recording.replay(adapter, realtime=not args.fast)
+
+        if not args.loop:
+            break
+
+
+if __name__ == "__main__":
+    main()
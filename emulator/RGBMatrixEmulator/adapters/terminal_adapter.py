@@ -0,0 +1,121 @@
+import atexit
+import shutil
+import sys
+
+import numpy as np
+
+from RGBMatrixEmulator.adapters.base import BaseAdapter
+from RGBMatrixEmulator.logger import Logger
+
+# Each terminal cell shows two LEDs: the upper half block is drawn in the foreground color, the lower in the background
+UPPER_HALF_BLOCK = "▀"
+
+CLEAR_SCREEN = "\x1b[2J"
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+RESET_COLORS = "\x1b[0m"
+
+
+def move_cursor(row, col):
+    return "\x1b[{};{}H".format(row + 1, col + 1)
+
+
+class TerminalAdapter(BaseAdapter):
+    """
+    Renders the matrix in a truecolor terminal, two LEDs per character cell.
+
+    Only cells that changed since the previous frame are redrawn, so the output per frame scales with how much of
+    the display changed rather than with the panel size. This keeps it usable over SSH.
+    """
+
+    def __init__(self, width, height, options):
+        super().__init__(width, height, options)
+        self.__previous = None
+        self.__terminal_size = None
+        self.output = sys.stdout
+        self.frame_bytes = 0
+
+    def load_emulator_window(self):
+        if self.loaded:
+            return
+
+        Logger.info(self.emulator_details_text())
+
+        self.__write(HIDE_CURSOR)
+        atexit.register(self.__restore_terminal)
+
+        self.loaded = True
+
+    def draw_to_screen(self, pixels):
+        pixels = np.asarray(pixels, dtype=np.uint8)
+
+        # Pad odd heights with a black row, so every cell has a lower LED
+        if pixels.shape[0] % 2:
+            pixels = np.concatenate([pixels, np.zeros_like(pixels[:1])])
+
+        # One row per terminal line, each cell packed as (upper RGB, lower RGB)
+        cells = np.concatenate([pixels[0::2], pixels[1::2]], axis=2)
+
+        terminal_size = shutil.get_terminal_size()
+        if self.__previous is None or terminal_size != self.__terminal_size:
+            # Nothing on screen can be trusted after a resize, so redraw everything
+            self.__terminal_size = terminal_size
+            changed = np.ones(cells.shape[:2], dtype=bool)
+            output = [RESET_COLORS, CLEAR_SCREEN]
+        else:
+            changed = np.any(cells != self.__previous, axis=2)
+            output = []
+
+        self.__previous = cells.copy()
+
+        rows, cols = np.nonzero(changed)
+        if len(rows) == 0:
+            self.frame_bytes = 0
+            return
+
+        output.extend(self.__render_cells(rows, cols, cells[rows, cols]))
+
+        # Park the cursor below the display, so anything else printed doesn't draw over it
+        output.append(RESET_COLORS)
+        output.append(move_cursor(cells.shape[0], 0))
+
+        self.frame_bytes = self.__write("".join(output))
+
+    def __render_cells(self, rows, cols, colors):
+        """
+        Yields escape sequences and characters for the given cells, in row-major order.
+
+        The cursor is only moved when a cell doesn't directly follow the previous one, and colors are only set when
+        they differ from the previous cell's.
+        """
+        cursor = None
+        foreground = background = None
+
+        for row, col, color in zip(rows.tolist(), cols.tolist(), colors.tolist()):
+            if cursor != (row, col):
+                yield move_cursor(row, col)
+
+            upper, lower = color[:3], color[3:]
+
+            if upper != foreground and lower != background:
+                yield "\x1b[38;2;{};{};{};48;2;{};{};{}m".format(*upper, *lower)
+            elif upper != foreground:
+                yield "\x1b[38;2;{};{};{}m".format(*upper)
+            elif lower != background:
+                yield "\x1b[48;2;{};{};{}m".format(*lower)
+
+            foreground, background = upper, lower
+
+            yield UPPER_HALF_BLOCK
+            cursor = (row, col + 1)
+
+    def __write(self, text):
+        data = text.encode("utf-8")
+
+        self.output.buffer.write(data)
+        self.output.flush()
+
+        return len(data)
+
+    def __restore_terminal(self):
+        self.__write(RESET_COLORS + SHOW_CURSOR)
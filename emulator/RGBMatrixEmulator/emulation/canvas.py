@@ -1,35 +1,54 @@
 import numpy as np
-from PIL import Image, ImageEnhance
+from RGBMatrixEmulator.emulation.pixel_mapper import PixelMapping
+from RGBMatrixEmulator.emulation.sprite_cache import SpriteCache
 from RGBMatrixEmulator.graphics.color import Color
 
 
 class Canvas:
+    # Converted images shared by every canvas, since double-buffered scripts draw the same images on both
+    SPRITES = SpriteCache()
+
     def __init__(self, options):
         self.options = options
 
-        self.width = options.cols * options.chain_length
-        self.height = options.rows * options.parallel
+        # Scripts draw on the mapped canvas, the display adapter shows the physical LED layout
+        self.__mapping = PixelMapping.get(options)
+
+        self.width = self.__mapping.width
+        self.height = self.__mapping.height
 
         # 3D numpy array -- rows (H), columns (W), 3-tuple RGB
         self.__pdims = (self.height, self.width, 3)
 
         self.display_adapter = options.display_adapter.get_instance(
-            self.width, self.height, options
+            self.__mapping.matrix_width, self.__mapping.matrix_height, options
         )
 
         self.Clear()
 
         self.display_adapter.load_emulator_window()
 
+    @property
+    def dirty_rects(self):
+        """
+        Regions changed since this canvas was last presented as (x, y, width, height), or None if unknown.
+
+        Only drawing done through the emulator's retained-mode helpers is tracked precisely. Any other drawing
+        call marks the whole canvas as changed.
+        """
+        return self.__dirty_rects
+
     def Clear(self):
         self.__pixels = np.full(
             self.__pdims, self.__create_pixel(Color.BLACK()), dtype=np.uint8
         )
+        self.__dirty_rects = None
 
     def Fill(self, r, g, b):
         self.__pixels = np.full(
             self.__pdims, self.__create_pixel((r, g, b)), dtype=np.uint8
         )
+        self.__dirty_rects = None
 
     def SetPixel(self, x, y, r, g, b):
         """Set RGB color value at given position."""
@@ -42,21 +61,62 @@ class Canvas:
         br = int(r * (self.brightness / 100.0))
         bg = int(g * (self.brightness / 100.0))
         bb = int(b * (self.brightness / 100.0))
-        
+
         # Ensure values stay in valid range
         br = max(0, min(255, br))
         bg = max(0, min(255, bg))
         bb = max(0, min(255, bb))
-        
+
         self.__pixels[int(y)][int(x)] = (br, bg, bb)
+        self.__dirty_rects = None
 
     def SetImage(self, image, offset_x=0, offset_y=0, *other):
-        enhancer = ImageEnhance.Brightness(image)
-        image = enhancer.enhance(self.brightness / 100.0)
+        """
+        Draws the image with its top left corner at the offset, clipped to the canvas.
 
-        original = Image.fromarray(self.__pixels, "RGB")
-        original.paste(image, (offset_x, offset_y))
-        self.__pixels = np.copy(original)
+        Images with an alpha channel are blended over the canvas.
+        """
+        self._draw_sprite(
+            Canvas.SPRITES.get(image, self.brightness), offset_x, offset_y
+        )
+
+    def _fill_rect(self, rect, color):
+        """
+        Fills an (x, y, width, height) rectangle, clipped to the canvas, with an already brightness-adjusted color.
+        """
+        region = self.__clip(rect)
+        if region is None:
+            return
+
+        top, bottom, left, right = region
+        self.__pixels[top:bottom, left:right] = color
+
+    def _draw_sprite(self, sprite, offset_x, offset_y, clip=None):
+        """
+        Draws a converted image at the offset, clipped to the canvas and to the optional (x, y, width, height)
+        clip rectangle.
+        """
+        offset_x, offset_y = int(offset_x), int(offset_y)
+        rect = (offset_x, offset_y) + sprite.size
+
+        region = self.__clip(rect if clip is None else self.__intersect(rect, clip))
+        if region is None:
+            return
+
+        top, bottom, left, right = region
+        target = self.__pixels[top:bottom, left:right]
+        source = (
+            slice(top - offset_y, bottom - offset_y),
+            slice(left - offset_x, right - offset_x),
+        )
+
+        if sprite.alpha is None:
+            target[...] = sprite.pixels[source]
+            return
+
+        alpha = sprite.alpha[source]
+        blended = sprite.pixels[source] * alpha + target * (255 - alpha) + 127
+        target[...] = blended // 255
 
     @property
     def brightness(self):
@@ -73,12 +133,56 @@ class Canvas:
 
         self.options.brightness = value
 
+    def __intersect(self, a, b):
+        x, y = max(a[0], b[0]), max(a[1], b[1])
+        right = min(a[0] + a[2], b[0] + b[2])
+        bottom = min(a[1] + a[3], b[1] + b[3])
+
+        return (x, y, max(right - x, 0), max(bottom - y, 0))
+
+    def __clip(self, rect):
+        """
+        Clips an (x, y, width, height) rectangle to the canvas, records it as dirty and returns its
+        (top, bottom, left, right) bounds, or None if nothing is left.
+        """
+        x, y, width, height = self.__intersect(rect, (0, 0, self.width, self.height))
+        if width == 0 or height == 0:
+            return None
+
+        # Drawing inside a region that was just filled is common, so don't record it twice
+        if self.__dirty_rects is not None and (
+            not self.__dirty_rects or self.__dirty_rects[-1] != (x, y, width, height)
+        ):
+            self.__dirty_rects.append((x, y, width, height))
+
+        return y, y + height, x, x + width
+
     def __create_pixel(self, pixel):
         return Color.adjust_brightness(tuple(pixel), self.brightness / 100.0)
 
     # These are delegated to the display adapter to handle specific implementation.
     def draw_to_screen(self):
-        self.display_adapter.draw_to_screen(self.__pixels)
+        pixels = self.__mapping.apply(self.__pixels)
+
+        if self.display_adapter.SUPPORTS_DIRTY_RECTS:
+            dirty_rects = self.__dirty_rects
+
+            # Rectangles are only meaningful against the last frame this canvas presented, in unmapped coordinates
+            if (
+                self.display_adapter.presented_canvas is not self
+                or self.__mapping.indices is not None
+            ):
+                dirty_rects = None
+
+            self.display_adapter.draw_to_screen(pixels, dirty_rects=dirty_rects)
+            self.display_adapter.presented_canvas = self
+        else:
+            self.display_adapter.draw_to_screen(pixels)
+
+        self.__dirty_rects = []
 
     def check_for_quit_event(self):
         self.display_adapter.check_for_quit_event()
+
+    def wait_for_vsync(self, frames=1):
+        self.display_adapter.vsync.wait(frames)
@@ -1,46 +1,138 @@
+import contextlib
+import threading
+
 from RGBMatrixEmulator.emulation.canvas import Canvas
+from RGBMatrixEmulator.emulation.pixel_mapper import PixelMapping
 
 
 class RGBMatrix:
     def __init__(self, options={}):
         self.options = options
 
-        self.width = options.cols * options.chain_length
-        self.height = options.rows * options.parallel
+        mapping = PixelMapping.get(options)
+        self.width = mapping.width
+        self.height = mapping.height
 
         self.canvas = None
 
+        # State for batching direct drawing calls into a single presentation. Direct drawing calls and every
+        # presentation hold the lock, so a deferred present on the timer thread never sees a half-drawn canvas.
+        self.__dirty = False
+        self.__batch_depth = 0
+        self.__present_lock = threading.RLock()
+        self.__present_timer = None
+
     def CreateFrameCanvas(self):
         self.canvas = Canvas(options=self.options)
 
         return self.canvas
 
-    def SwapOnVSync(self, canvas):
-        canvas.check_for_quit_event()
-        canvas.draw_to_screen()
-        self.canvas = canvas
+    def SwapOnVSync(self, canvas, framerate_fraction=1):
+        canvas.wait_for_vsync(framerate_fraction)
 
-        return self.canvas
+        with self.__present_lock:
+            # This presents the display, so a pending deferred present would only show it again
+            self.__cancel_scheduled_present()
+            self.__dirty = False
+
+            return self.__show(canvas)
 
     def Clear(self):
-        self.__sync_canvas()
-        self.canvas.Clear()
-        self.SwapOnVSync(self.canvas)
+        with self.__present_lock:
+            self.__sync_canvas()
+            self.canvas.Clear()
+            self.__present()
 
     def Fill(self, r, g, b):
-        self.__sync_canvas()
-        self.canvas.Fill(r, g, b)
-        self.SwapOnVSync(self.canvas)
+        with self.__present_lock:
+            self.__sync_canvas()
+            self.canvas.Fill(r, g, b)
+            self.__present()
 
     def SetPixel(self, x, y, r, g, b):
-        self.__sync_canvas()
-        self.canvas.SetPixel(x, y, r, g, b)
-        self.SwapOnVSync(self.canvas)
+        with self.__present_lock:
+            self.__sync_canvas()
+            self.canvas.SetPixel(x, y, r, g, b)
+            self.__present()
 
     def SetImage(self, image, offset_x=0, offset_y=0, *other):
-        self.__sync_canvas()
-        self.canvas.SetImage(image, offset_x, offset_y, *other)
-        self.SwapOnVSync(self.canvas)
+        with self.__present_lock:
+            self.__sync_canvas()
+            self.canvas.SetImage(image, offset_x, offset_y, *other)
+            self.__present()
+
+    def flush(self):
+        """
+        Presents any direct drawing calls on the matrix that haven't been shown yet.
+        """
+        with self.__present_lock:
+            self.__cancel_scheduled_present()
+
+            if not self.__dirty:
+                return
+
+            self.__dirty = False
+            self.__show(self.canvas)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Batches direct drawing calls on the matrix into a single presentation when the block exits.
+
+        Example:
+            with matrix.batch():
+                for x in range(matrix.width):
+                    matrix.SetPixel(x, 0, 255, 0, 0)
+        """
+        self.__batch_depth += 1
+
+        try:
+            yield self
+        finally:
+            self.__batch_depth -= 1
+
+            if self.__batch_depth == 0:
+                self.flush()
+
+    def __present(self):
+        """
+        Presents a direct drawing call, or defers it. Called with the present lock held.
+        """
+        if self.__batch_depth > 0:
+            self.__dirty = True
+        elif self.options.deferred_present:
+            self.__schedule_present()
+        else:
+            self.__show(self.canvas)
+
+    def __schedule_present(self):
+        """
+        Marks the frame dirty and presents it on the next frame tick, coalescing any calls made in between.
+        Called with the present lock held.
+        """
+        self.__dirty = True
+
+        if self.__present_timer is None:
+            self.__present_timer = threading.Timer(
+                1.0 / max(self.options.browser.target_fps, 1), self.flush
+            )
+            self.__present_timer.daemon = True
+            self.__present_timer.start()
+
+    def __cancel_scheduled_present(self):
+        if self.__present_timer is not None:
+            self.__present_timer.cancel()
+            self.__present_timer = None
+
+    def __show(self, canvas):
+        """
+        Presents the canvas immediately. Direct drawing calls update the live display, so they skip vsync.
+        """
+        canvas.check_for_quit_event()
+        canvas.draw_to_screen()
+        self.canvas = canvas
+
+        return self.canvas
 
     def __sync_canvas(self):
         if not self.canvas:
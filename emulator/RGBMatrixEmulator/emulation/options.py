@@ -1,6 +1,6 @@
 import json, os, pprint, sys
 
-from RGBMatrixEmulator.adapters import ADAPTER_TYPES
+from RGBMatrixEmulator.adapters import adapter_names, load_adapter
 from RGBMatrixEmulator.logger import Logger
 
 
@@ -20,36 +20,47 @@ class RGBMatrixOptions:
         self.show_refresh_rate = 0
         self.gpio_slowdown = None
         self.disable_hardware_pulsing = False
+        self.pixel_mapper_config = ""
+
+        # Emulator only: matrices with different names get their own display. The browser adapter serves each
+        # named matrix under "/<name>/" on the shared server.
+        self.name = ""
 
         emulator_config = RGBMatrixEmulatorConfig()
 
-        if emulator_config.display_adapter.lower() in ADAPTER_TYPES:
-            self.display_adapter = ADAPTER_TYPES[
-                emulator_config.display_adapter.lower()
-            ]
-        elif len(ADAPTER_TYPES.keys()) > 0:
-            adapter_types = ", ".join(
-                '"{}"'.format(key) for key in ADAPTER_TYPES.keys()
-            )
+        suppress_errors = emulator_config.suppress_adapter_load_errors
+        self.display_adapter = load_adapter(
+            emulator_config.display_adapter, suppress_errors
+        )
 
-            # Try to set it to the emulator default, but if it failed to load, pick the first one that did.
-            if emulator_config.DEFAULT_CONFIG.get("display_adapter") in ADAPTER_TYPES:
-                default_adapter = emulator_config.DEFAULT_CONFIG.get("display_adapter")
-            else:
-                default_adapter = list(ADAPTER_TYPES.keys())[0]
+        if self.display_adapter is None:
+            names = adapter_names()
+            adapter_types = ", ".join('"{}"'.format(key) for key in names)
+
+            # Try to set it to the emulator default, but if it fails to load, pick the first one that does.
+            fallbacks = [emulator_config.DEFAULT_CONFIG.get("display_adapter")] + names
+            default_adapter = None
+            for name in fallbacks:
+                if name == emulator_config.display_adapter.lower():
+                    continue
+
+                self.display_adapter = load_adapter(name, suppress_errors=True)
+                if self.display_adapter is not None:
+                    default_adapter = name
+                    break
+
+            if self.display_adapter is None:
+                Logger.critical(
+                    "Failed to find a valid display adapter to load! Check that you have installed dependencies required for your configured adapter."
+                )
+
+                sys.exit(1)
 
             Logger.warning(
-                '"{}" display adapter option not recognized. Valid adapters are {}. Defaulting to "{}"...'.format(
+                '"{}" display adapter could not be loaded. Valid adapters are {}. Defaulting to "{}"...'.format(
                     emulator_config.display_adapter, adapter_types, default_adapter
                 )
             )
-            self.display_adapter = ADAPTER_TYPES[default_adapter]
-        else:
-            Logger.critical(
-                "Failed to find a valid display adapter to load! Check that you have installed dependencies required for your configured adapter."
-            )
-
-            sys.exit(1)
 
         self.pixel_style = emulator_config.DEFAULT_CONFIG.get("pixel_style")
         config_pixel_style = emulator_config.pixel_style.lower()
@@ -75,6 +86,9 @@ class RGBMatrixOptions:
         self.pixel_outline = emulator_config.DEFAULT_CONFIG["pixel_outline"]
         self.pixel_outline = emulator_config.pixel_outline
         self.browser = emulator_config.browser
+        self.recorder = emulator_config.recorder
+        self.deferred_present = emulator_config.deferred_present
+        self.vsync = emulator_config.vsync
 
         if emulator_config.suppress_font_warnings:
             import bdfparser
@@ -104,6 +118,8 @@ class RGBMatrixEmulatorConfig:
         "display_adapter": "browser",
         "suppress_font_warnings": False,
         "suppress_adapter_load_errors": False,
+        "deferred_present": False,
+        "vsync": True,
         "browser": {
             "_comment": "For use with the browser adapter only.",
             "port": 8888,
@@ -113,6 +129,15 @@ class RGBMatrixEmulatorConfig:
             "image_border": True,
             "debug_text": False,
             "image_format": "JPEG",
+            "push_frames": True,
+            "transport": "image",
+            "keyframe_interval": 60,
+            "server_process": False,
+            "metrics": False,
+        },
+        "recorder": {
+            "_comment": "For use with the recorder adapter only.",
+            "path": "recording.rgbme",
         },
         "log_level": "info",
     }
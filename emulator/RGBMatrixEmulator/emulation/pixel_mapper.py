@@ -0,0 +1,190 @@
+import numpy as np
+
+from RGBMatrixEmulator.logger import Logger
+
+
+class UMapper:
+    """
+    Folds a long chain in half into a U, so the display is half as wide and twice as tall.
+    """
+
+    NAME = "u-mapper"
+
+    def __init__(self, parameter, parallel):
+        self.parallel = parallel
+
+    def validate(self, width, height):
+        if width % 2 != 0:
+            return "the chain must be an even number of panels"
+
+    def size(self, width, height):
+        return width // 2, height * 2
+
+    def map(self, width, height, x, y):
+        panel_height = height // self.parallel
+        visible_width = width // 2
+        slab_height = 2 * panel_height
+
+        base_y = (y // slab_height) * panel_height
+        y = y % slab_height
+        upper = y < panel_height
+
+        matrix_x = np.where(upper, x + visible_width, visible_width - x - 1)
+        matrix_y = np.where(upper, y, slab_height - y - 1)
+
+        return matrix_x, base_y + matrix_y
+
+
+class RotateMapper:
+    """
+    Rotates the display clockwise by a multiple of 90 degrees.
+    """
+
+    NAME = "rotate"
+
+    def __init__(self, parameter, parallel):
+        try:
+            self.angle = int(parameter or 0) % 360
+        except ValueError:
+            self.angle = None
+
+    def validate(self, width, height):
+        if self.angle is None or self.angle % 90 != 0:
+            return "the angle must be a multiple of 90"
+
+    def size(self, width, height):
+        if self.angle % 180 == 0:
+            return width, height
+
+        return height, width
+
+    def map(self, width, height, x, y):
+        if self.angle == 90:
+            return width - y - 1, x
+        if self.angle == 180:
+            return width - x - 1, height - y - 1
+        if self.angle == 270:
+            return y, height - x - 1
+
+        return x, y
+
+
+class MirrorMapper:
+    """
+    Mirrors the display horizontally ("H", the default) or vertically ("V").
+    """
+
+    NAME = "mirror"
+
+    def __init__(self, parameter, parallel):
+        self.direction = (parameter or "H").upper()
+
+    def validate(self, width, height):
+        if self.direction not in ["H", "V"]:
+            return 'the direction must be "H" or "V"'
+
+    def size(self, width, height):
+        return width, height
+
+    def map(self, width, height, x, y):
+        if self.direction == "H":
+            return width - x - 1, y
+
+        return x, height - y - 1
+
+
+class PixelMapping:
+    """
+    Maps the canvas scripts draw on to the physical LED layout, like `--led-pixel-mapper` does on hardware.
+
+    Mappers are chained with semicolons, e.g. "U-mapper;Rotate:90". The chain is composed once into a single
+    permutation, so presenting a frame is one gather regardless of how many mappers are configured.
+    """
+
+    MAPPERS = {mapper.NAME: mapper for mapper in [UMapper, RotateMapper, MirrorMapper]}
+
+    # Mappings keyed by (matrix size, parallel chains, mapper config), shared across canvases
+    MAPPINGS = {}
+
+    def __init__(self, matrix_width, matrix_height, parallel, config):
+        self.matrix_width = matrix_width
+        self.matrix_height = matrix_height
+
+        # Physical LED index for each visible pixel
+        matrix_indices = np.arange(matrix_width * matrix_height).reshape(
+            matrix_height, matrix_width
+        )
+        width, height = matrix_width, matrix_height
+        identity = True
+
+        for mapper in self.__parse(config, parallel):
+            error = mapper.validate(width, height)
+            if error:
+                Logger.warning(
+                    'Ignoring pixel mapper "{}": {}.'.format(mapper.NAME, error)
+                )
+                continue
+
+            visible_width, visible_height = mapper.size(width, height)
+            y, x = np.mgrid[0:visible_height, 0:visible_width]
+            matrix_x, matrix_y = mapper.map(width, height, x, y)
+
+            matrix_indices = matrix_indices[matrix_y, matrix_x]
+            width, height = visible_width, visible_height
+            identity = False
+
+        self.width = width
+        self.height = height
+
+        if identity:
+            self.indices = None
+        else:
+            # Invert it, so presenting is a gather of visible pixels for each physical LED
+            self.indices = np.empty(matrix_width * matrix_height, dtype=np.intp)
+            self.indices[matrix_indices.ravel()] = np.arange(width * height)
+
+    @classmethod
+    def get(cls, options):
+        key = (
+            options.cols * options.chain_length,
+            options.rows * options.parallel,
+            options.parallel,
+            options.pixel_mapper_config or "",
+        )
+
+        if key not in cls.MAPPINGS:
+            cls.MAPPINGS[key] = cls(*key)
+
+        return cls.MAPPINGS[key]
+
+    def apply(self, pixels):
+        """
+        Rearranges a visible (height, width, 3) frame into the physical LED layout.
+        """
+        if self.indices is None:
+            return pixels
+
+        return pixels.reshape(-1, 3)[self.indices].reshape(
+            self.matrix_height, self.matrix_width, 3
+        )
+
+    def __parse(self, config, parallel):
+        mappers = []
+
+        for spec in config.split(";"):
+            name, _, parameter = spec.strip().partition(":")
+            if not name:
+                continue
+
+            mapper = self.MAPPERS.get(name.lower())
+            if mapper is None:
+                Logger.warning(
+                    'Pixel mapper "{}" not recognized. Valid mappers are {}.'.format(
+                        name, ", ".join('"{}"'.format(key) for key in self.MAPPERS)
+                    )
+                )
+                continue
+
+            mappers.append(mapper(parameter, parallel))
+
+        return mappers
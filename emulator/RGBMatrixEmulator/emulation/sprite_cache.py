@@ -0,0 +1,81 @@
+import collections
+import weakref
+
+import numpy as np
+
+
+class Sprite:
+    """
+    An image converted to brightness-scaled RGB pixels, plus its alpha channel if it has one.
+    """
+
+    def __init__(self, image, brightness):
+        self.brightness = brightness
+        self.source = image.tobytes()
+        self.mode = image.mode
+        self.size = image.size
+
+        has_alpha = image.mode in ["RGBA", "LA", "PA"] or (
+            image.mode == "P" and "transparency" in image.info
+        )
+        pixels = np.asarray(image.convert("RGBA" if has_alpha else "RGB"))
+
+        self.alpha = None
+        if has_alpha:
+            self.alpha = pixels[..., 3:4].astype(np.uint16)
+            pixels = pixels[..., :3]
+
+            # Fully opaque images can be copied straight in
+            if (self.alpha == 255).all():
+                self.alpha = None
+
+        # Same float32 truncation as PIL's ImageEnhance.Brightness, so results match what SetImage used to draw
+        if brightness != 100:
+            pixels = (pixels * np.float32(brightness / 100.0)).astype(np.uint8)
+
+        self.pixels = np.ascontiguousarray(pixels)
+
+    def matches(self, image, brightness):
+        return (
+            self.brightness == brightness
+            and self.mode == image.mode
+            and self.size == image.size
+            and self.source == image.tobytes()
+        )
+
+
+class SpriteCache:
+    """
+    Converted images keyed by the PIL image they came from, so images drawn every frame are only converted once.
+
+    Images can be modified in place (e.g. with ImageDraw), so a cached sprite is only reused if the image's raw
+    bytes still match. Comparing bytes is much cheaper than converting and brightness-scaling the image again.
+    """
+
+    def __init__(self, size=64):
+        self.size = size
+        self.__sprites = collections.OrderedDict()
+
+    def get(self, image, brightness):
+        key = id(image)
+        entry = self.__sprites.get(key)
+
+        if entry is not None:
+            reference, sprite = entry
+            if reference() is image and sprite.matches(image, brightness):
+                self.__sprites.move_to_end(key)
+                return sprite
+
+        sprite = Sprite(image, brightness)
+
+        # PIL images aren't hashable, so key on id() and drop the entry once the image is garbage collected
+        self.__sprites[key] = (
+            weakref.ref(image, lambda _, key=key: self.__sprites.pop(key, None)),
+            sprite,
+        )
+        self.__sprites.move_to_end(key)
+
+        while len(self.__sprites) > self.size:
+            self.__sprites.popitem(last=False)
+
+        return sprite
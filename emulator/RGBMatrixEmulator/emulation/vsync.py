@@ -0,0 +1,76 @@
+import time
+
+# Larger values smooth timing stats more heavily, matching the browser client's FPS smoothing
+TIME_SMOOTHING = 0.9
+
+
+def smooth_time(average, sample):
+    if average is None:
+        return sample
+
+    return (average * TIME_SMOOTHING) + (sample * (1.0 - TIME_SMOOTHING))
+
+
+class VSync:
+    """
+    Emulates a panel's vertical sync by pacing presentations to a fixed frame rate.
+
+    Like SwapOnVSync in rpi-rgb-led-matrix, waiting blocks until the next vsync, so loops that swap
+    faster than the display can show frames sleep instead of spinning. Swaps are coalesced by holding the
+    script back rather than by dropping its frames, which would still leave it drawing frames nobody sees.
+    """
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps if fps > 0 else 0
+        self.frame_time = None
+
+        # How late swaps land after their vsync deadline
+        self.jitter = None
+
+        # Time the script spent drawing before its latest wait, i.e. since the previous vsync
+        self.render_time = None
+        self.__next_vsync = None
+        self.__last_vsync = None
+
+    def wait(self, frames=1):
+        """
+        Blocks until the next vsync, or the nth one with frames > 1.
+        """
+        now = time.perf_counter()
+
+        if self.__last_vsync is not None:
+            self.render_time = now - self.__last_vsync
+
+        if self.__next_vsync is None:
+            self.__next_vsync = now
+        else:
+            self.__next_vsync += self.interval * max(frames, 1)
+
+        deadline = self.__next_vsync
+
+        # After a long stall, resync instead of presenting a burst of frames to catch up
+        if self.__next_vsync < now - self.interval:
+            self.__next_vsync = now
+
+        delay = self.__next_vsync - now
+        if delay > 0:
+            time.sleep(delay)
+
+        self.__record(time.perf_counter(), deadline)
+
+    def stats(self):
+        return {
+            "fps": 1.0 / self.frame_time if self.frame_time else None,
+            "frame_time_ms": self.frame_time * 1000 if self.frame_time else None,
+            "jitter_ms": self.jitter * 1000 if self.jitter is not None else None,
+        }
+
+    def __record(self, now, deadline):
+        if self.__last_vsync is not None:
+            self.frame_time = smooth_time(self.frame_time, now - self.__last_vsync)
+
+        # Unpaced swaps have no deadline to be late for
+        if self.interval:
+            self.jitter = smooth_time(self.jitter, max(now - deadline, 0.0))
+
+        self.__last_vsync = now
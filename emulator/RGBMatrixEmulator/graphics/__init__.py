@@ -1,5 +1,7 @@
 from RGBMatrixEmulator.graphics.color import Color
 from RGBMatrixEmulator.graphics.font import Font
+from RGBMatrixEmulator.graphics.marquee import Marquee
+from RGBMatrixEmulator.graphics.scene import MarqueeNode, Scene, TextNode
 
 
 def DrawText(canvas, font, x, y, color, text):
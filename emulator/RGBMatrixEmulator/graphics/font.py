@@ -1,4 +1,5 @@
 import bdfparser
+import numpy as np
 
 
 class Font:
@@ -34,3 +35,18 @@ class Font:
         if self.bdf_font is None:
             return 0
         return self.headers["fbby"] + self.headers["fbbyoff"]
+
+    def rasterize(self, text):
+        """
+        Renders text to a 2D array with 1 for lit pixels, `height` rows tall and as wide as the text.
+        """
+        if len(text) == 0:
+            return np.zeros((self.height, 0), dtype=np.uint8)
+
+        # Ensure text doesn't get drawn as multiple lines, same as DrawText
+        linelimit = len(text) * (self.headers["fbbx"] + 1)
+        text_map = self.bdf_font.draw(
+            text, linelimit, missing=self.default_character
+        ).todata(2)
+
+        return np.array(text_map, dtype=np.uint8)
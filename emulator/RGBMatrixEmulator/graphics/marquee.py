@@ -0,0 +1,104 @@
+import time
+
+import numpy as np
+from PIL import Image
+
+from RGBMatrixEmulator.emulation.sprite_cache import Sprite
+
+
+class Marquee:
+    """
+    Text that scrolls horizontally through a fixed-width region of the canvas.
+
+    The text is rasterized once into an off-screen strip. Drawing a frame copies a window of that strip onto the
+    canvas, instead of rendering the text again. Scroll position depends on elapsed time rather than on how often
+    `draw` is called, so the speed stays the same at any frame rate. Text that fits in the region doesn't scroll.
+
+    Example:
+        marquee = graphics.Marquee(font, graphics.Color(255, 255, 255), "a_very_long_username", width=50)
+
+        while True:
+            canvas.Clear()
+            marquee.draw(canvas, 2, 10)
+            canvas = matrix.SwapOnVSync(canvas)
+    """
+
+    def __init__(self, font, color, text, width, speed=16, gap=None, pause=1.0):
+        """
+        `speed` is in pixels per second, `gap` is the blank space in pixels between the end of the text and its
+        next repeat (defaults to a third of `width`), and `pause` is how long the text rests at its starting
+        position each cycle, in seconds.
+        """
+        self.font = font
+        self.text = text
+        self.width = width
+        self.speed = speed
+        self.pause = pause
+        self.start = time.perf_counter()
+
+        if not isinstance(color, tuple):
+            color = (color.red, color.green, color.blue)
+
+        text_map = font.rasterize(text)
+        self.text_width = text_map.shape[1]
+        self.scrolls = self.text_width > width
+
+        if self.scrolls:
+            gap = width // 3 if gap is None else gap
+            self.period = self.text_width + gap
+
+            # Repeat enough of the start after the gap that every window position is a single slice of the strip
+            text_map = np.pad(text_map, ((0, 0), (0, gap)))
+            text_map = np.concatenate([text_map, text_map[:, :width]], axis=1)
+        else:
+            self.period = 0
+
+        # Text pixels take the color, everything else is transparent so whatever is behind the marquee shows through
+        strip = np.zeros(text_map.shape + (4,), dtype=np.uint8)
+        strip[text_map == 1] = color + (255,)
+        self.strip = Image.fromarray(strip, "RGBA")
+
+        # Brightness-scaled strips, keyed by brightness
+        self.__sprites = {}
+
+    def offset(self, now=None):
+        """
+        How many pixels the text has scrolled at time `now` (from `time.perf_counter()`).
+        """
+        if not self.scrolls:
+            return 0
+
+        elapsed = (time.perf_counter() if now is None else now) - self.start
+        scroll_time = self.period / self.speed
+        cycle_time = elapsed % (self.pause + scroll_time)
+
+        if cycle_time < self.pause:
+            return 0
+
+        return int((cycle_time - self.pause) * self.speed) % self.period
+
+    def draw(self, canvas, x, y, now=None, clip=None):
+        """
+        Draws the visible part of the text with its left edge at `x` and its baseline at `y`, like `DrawText`.
+
+        `clip` optionally limits drawing further, to an (x, y, width, height) rectangle.
+        """
+        sprite = self.__sprites.get(canvas.brightness)
+        if sprite is None:
+            sprite = self.__sprites[canvas.brightness] = Sprite(
+                self.strip, canvas.brightness
+            )
+
+        top = y - (self.font.headers["fbby"] + self.font.headers["fbbyoff"])
+        region = (x, top, self.width, self.strip.height)
+
+        if clip is not None:
+            left, top_edge = max(region[0], clip[0]), max(region[1], clip[1])
+            right = min(region[0] + region[2], clip[0] + clip[2])
+            bottom = min(region[1] + region[3], clip[1] + clip[3])
+            if right <= left or bottom <= top_edge:
+                return
+
+            region = (left, top_edge, right - left, bottom - top_edge)
+
+        canvas._draw_sprite(sprite, x - self.offset(now), top, clip=region)
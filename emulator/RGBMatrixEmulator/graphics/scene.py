@@ -0,0 +1,271 @@
+import weakref
+
+from PIL import Image
+
+from RGBMatrixEmulator.emulation.sprite_cache import Sprite
+
+
+class TextNode:
+    """
+    A line of text in a `Scene`. Changing `x`, `y`, `color` or `text` marks it for redrawing.
+
+    The text is rasterized once each time it changes, rather than every time it is drawn.
+    """
+
+    def __init__(self, font, x, y, color, text=""):
+        self.font = font
+        self.__x = x
+        self.__y = y
+        self.__color = self.__to_tuple(color)
+        self.__text = text
+        self.version = 0
+        self.__sprites = {}
+        self.__rasterize()
+
+    @property
+    def x(self):
+        return self.__x
+
+    @x.setter
+    def x(self, value):
+        self.__update(value, self.__y, self.__color, self.__text)
+
+    @property
+    def y(self):
+        return self.__y
+
+    @y.setter
+    def y(self, value):
+        self.__update(self.__x, value, self.__color, self.__text)
+
+    @property
+    def color(self):
+        return self.__color
+
+    @color.setter
+    def color(self, value):
+        self.__update(self.__x, self.__y, value, self.__text)
+
+    @property
+    def text(self):
+        return self.__text
+
+    @text.setter
+    def text(self, value):
+        self.__update(self.__x, self.__y, self.__color, value)
+
+    @property
+    def bounds(self):
+        """
+        The (x, y, width, height) area the text covers. Like `DrawText`, `y` is the baseline.
+        """
+        top = self.__y - (self.font.headers["fbby"] + self.font.headers["fbbyoff"])
+
+        return (self.__x, top) + self.__image.size
+
+    def draw(self, canvas, clip):
+        if self.__image.width == 0:
+            return
+
+        sprite = self.__sprites.get(canvas.brightness)
+        if sprite is None:
+            sprite = self.__sprites[canvas.brightness] = Sprite(
+                self.__image, canvas.brightness
+            )
+
+        x, y, _, _ = self.bounds
+        canvas._draw_sprite(sprite, x, y, clip=clip)
+
+    def __update(self, x, y, color, text):
+        color = self.__to_tuple(color)
+        if (x, y, color, text) == (self.__x, self.__y, self.__color, self.__text):
+            return
+
+        rasterize = (color, text) != (self.__color, self.__text)
+        self.__x, self.__y, self.__color, self.__text = x, y, color, text
+        self.version += 1
+
+        if rasterize:
+            self.__rasterize()
+
+    def __to_tuple(self, color):
+        # Colors are compared to detect changes, and graphics.Color doesn't implement equality
+        if isinstance(color, tuple):
+            return color
+
+        return (color.red, color.green, color.blue)
+
+    def __rasterize(self):
+        text_map = self.font.rasterize(self.__text)
+        alpha = (text_map * 255).astype("uint8")
+
+        self.__image = Image.new(
+            "RGBA", (text_map.shape[1], text_map.shape[0]), self.__color
+        )
+        if self.__image.width > 0:
+            self.__image.putalpha(Image.fromarray(alpha, "L"))
+
+        self.__sprites = {}
+
+
+class MarqueeNode:
+    """
+    A `Marquee` in a `Scene`, with its left edge at `x` and its baseline at `y`.
+
+    Call `update` with the frame's time before each render. The node is only repainted when the text has scrolled
+    since it was last drawn, or when `x`, `y` or `marquee` change. `marquee` may be None to show nothing.
+    """
+
+    def __init__(self, marquee, x, y):
+        self.__marquee = marquee
+        self.__x = x
+        self.__y = y
+        self.__now = None
+        self.__offset = 0
+        self.version = 0
+
+    @property
+    def marquee(self):
+        return self.__marquee
+
+    @marquee.setter
+    def marquee(self, value):
+        self.__update(value, self.__x, self.__y)
+
+    @property
+    def x(self):
+        return self.__x
+
+    @x.setter
+    def x(self, value):
+        self.__update(self.__marquee, value, self.__y)
+
+    @property
+    def y(self):
+        return self.__y
+
+    @y.setter
+    def y(self, value):
+        self.__update(self.__marquee, self.__x, value)
+
+    @property
+    def bounds(self):
+        """
+        The (x, y, width, height) region the marquee scrolls through. Like `DrawText`, `y` is the baseline.
+        """
+        if self.__marquee is None:
+            return (self.__x, self.__y, 0, 0)
+
+        font = self.__marquee.font
+        top = self.__y - (font.headers["fbby"] + font.headers["fbbyoff"])
+
+        return (self.__x, top, self.__marquee.width, self.__marquee.strip.height)
+
+    def update(self, now):
+        """
+        Scrolls the text to where it should be at time `now` (from `time.perf_counter()`).
+        """
+        self.__now = now
+
+        offset = self.__marquee.offset(now) if self.__marquee is not None else 0
+        if offset != self.__offset:
+            self.__offset = offset
+            self.version += 1
+
+    def draw(self, canvas, clip):
+        if self.__marquee is not None:
+            self.__marquee.draw(canvas, self.__x, self.__y, now=self.__now, clip=clip)
+
+    def __update(self, marquee, x, y):
+        if (marquee, x, y) == (self.__marquee, self.__x, self.__y):
+            return
+
+        self.__marquee, self.__x, self.__y = marquee, x, y
+        self.version += 1
+
+
+class Scene:
+    """
+    Retained-mode drawing: the scene owns a canvas's contents and only repaints the regions that changed.
+
+    Each `render` compares every node with how it was last drawn on that canvas. Only the old and new areas of
+    changed nodes are cleared and redrawn, and those regions are reported to the display adapter, so encoding can
+    be incremental too. Scenes keep track of each canvas separately, so double buffering works as expected.
+
+    Example:
+        scene = graphics.Scene()
+        score = scene.add(graphics.TextNode(font, 2, 10, graphics.Color(255, 255, 255), "0"))
+
+        while True:
+            score.text = str(get_score())
+            scene.render(canvas)
+            canvas = matrix.SwapOnVSync(canvas)
+
+    Anything drawn on the canvas outside of the scene may be painted over. Call `invalidate` to repaint
+    everything on the next render.
+    """
+
+    def __init__(self, background=(0, 0, 0)):
+        self.background = background
+        self.nodes = []
+
+        # For each canvas, its brightness and the (version, bounds) each node had when it was last drawn there
+        self.__drawn = weakref.WeakKeyDictionary()
+
+    def add(self, node):
+        self.nodes.append(node)
+
+        return node
+
+    def remove(self, node):
+        self.nodes.remove(node)
+
+    def invalidate(self):
+        self.__drawn.clear()
+
+    def render(self, canvas):
+        """
+        Brings the canvas up to date with the scene and returns the (x, y, width, height) regions that were repainted.
+        """
+        brightness, drawn = self.__drawn.get(canvas, (None, None))
+        current = {node: (node.version, node.bounds) for node in self.nodes}
+
+        if drawn is None or brightness != canvas.brightness:
+            dirty = [(0, 0, canvas.width, canvas.height)]
+        else:
+            dirty = []
+            for node, state in current.items():
+                if drawn.get(node) != state:
+                    dirty.append(state[1])
+                    if node in drawn:
+                        dirty.append(drawn[node][1])
+
+            dirty.extend(
+                state[1] for node, state in drawn.items() if node not in current
+            )
+
+        # Empty text has no area, and a node that changed in place would otherwise be repainted twice
+        dirty = list(dict.fromkeys(rect for rect in dirty if rect[2] and rect[3]))
+
+        background = tuple(
+            int(channel * canvas.brightness / 100.0) for channel in self.background
+        )
+
+        for rect in dirty:
+            canvas._fill_rect(rect, background)
+
+            for node in self.nodes:
+                if self.__overlaps(rect, current[node][1]):
+                    node.draw(canvas, clip=rect)
+
+        self.__drawn[canvas] = (canvas.brightness, current)
+
+        return dirty
+
+    def __overlaps(self, a, b):
+        return (
+            a[0] < b[0] + b[2]
+            and b[0] < a[0] + a[2]
+            and a[1] < b[1] + b[3]
+            and b[1] < a[1] + a[3]
+        )
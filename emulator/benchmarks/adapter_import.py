@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+Measures emulator startup cost with the lazy display adapter registry.
+
+Each scenario runs in a fresh interpreter, so nothing is already cached in sys.modules:
+
+  import          `import RGBMatrixEmulator` alone (no adapter is imported yet)
+  configured      import, then load only the named adapter (what RGBMatrixOptions does)
+  all adapters    import, then load every known adapter (what the old eager registry did at import time)
+
+Usage: python adapter_import.py [--runs N] [--adapter browser]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+SCENARIOS = {
+    "import": "",
+    "configured": "load_adapter({adapter!r}, suppress_errors=True)",
+    "all adapters": "[load_adapter(name, suppress_errors=True) for name in adapter_names()]",
+}
+
+TEMPLATE = """
+import time
+start = time.perf_counter()
+import RGBMatrixEmulator
+from RGBMatrixEmulator.adapters import adapter_names, load_adapter
+{statement}
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def time_scenario(statement, runs):
+    samples = []
+
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", TEMPLATE.format(statement=statement)],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", default=7, type=int)
+    parser.add_argument("--adapter", default="browser")
+    args = parser.parse_args()
+
+    for label, statement in SCENARIOS.items():
+        elapsed = time_scenario(statement.format(adapter=args.adapter), args.runs)
+
+        print("{:<14} {:8.1f} ms (median of {})".format(label, elapsed, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Microbenchmark for BaseAdapter._get_masked_image at the production sign geometry.
+
+Compares the original resize + composite implementation against the current one, for both
+changing frames (every call sees new pixels) and static frames (the same pixels re-presented).
+
+Usage: python masked_image.py [--iterations N] [--pixel-style square|circle]
+"""
+
+import argparse
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from RGBMatrixEmulator import RGBMatrixOptions
+from RGBMatrixEmulator.adapters.base import BaseAdapter
+
+
+def build_options(pixel_style):
+    options = RGBMatrixOptions()
+    options.rows = 128
+    options.cols = 64
+    options.chain_length = 2
+    options.parallel = 1
+    options.pixel_size = 16
+    options.pixel_style = pixel_style
+
+    return options
+
+
+class LegacyMasker:
+    """
+    The pre-optimization implementation: upscale through PIL, then composite against black.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.black = Image.new("RGB", options.window_size(), "black")
+        self.mask = Image.new("L", options.window_size())
+
+        drawer = ImageDraw.Draw(self.mask)
+        pixel_size = options.pixel_size
+        width, height = options.window_size()
+        for y in range(0, height, pixel_size):
+            for x in range(0, width, pixel_size):
+                if options.pixel_style == "circle":
+                    drawer.ellipse(
+                        (x, y, x + pixel_size - 1, y + pixel_size - 1), fill=255
+                    )
+                else:
+                    drawer.rectangle((x, y, x + pixel_size, y + pixel_size), fill=255)
+
+    def get_masked_image(self, pixels):
+        image = Image.fromarray(np.array(pixels, dtype=np.uint8), "RGB")
+        image = image.resize(self.options.window_size(), Image.NEAREST)
+
+        return Image.composite(image, self.black, self.mask)
+
+
+def time_per_call(fn, frames, iterations):
+    fn(frames[0])
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(frames[i % len(frames)])
+
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", default=50, type=int)
+    parser.add_argument("--pixel-style", default="square", choices=["square", "circle"])
+    args = parser.parse_args()
+
+    options = build_options(args.pixel_style)
+    width = options.cols * options.chain_length
+    height = options.rows * options.parallel
+
+    adapter = BaseAdapter(width, height, options)
+    legacy = LegacyMasker(options)
+
+    rng = np.random.default_rng(0)
+    changing = [
+        rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(2)
+    ]
+    static = changing[:1]
+
+    expected = np.asarray(legacy.get_masked_image(changing[0]))
+    actual = np.asarray(adapter._get_masked_image(changing[0]))
+    if not np.array_equal(expected, actual):
+        raise SystemExit("Masked images differ between implementations!")
+
+    print(
+        "{}x{} LEDs, {}px per LED ({}), window {}".format(
+            width,
+            height,
+            options.pixel_size,
+            args.pixel_style,
+            options.window_size_str("px"),
+        )
+    )
+
+    for label, frames in [("changing frames", changing), ("static frames", static)]:
+        before = time_per_call(legacy.get_masked_image, frames, args.iterations)
+        after = time_per_call(adapter._get_masked_image, frames, args.iterations)
+
+        print(
+            "{:<16} legacy {:8.3f} ms | current {:8.3f} ms | {:7.1f}x".format(
+                label, before, after, before / after
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
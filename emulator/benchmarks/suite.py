@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+"""
+Benchmark suite for the emulator's drawing and presentation paths, at the production sign geometry.
+
+Each case is timed for at least --min-time seconds and reported as calls per second ("fps" for per-frame work),
+along with the peak memory a single call allocates on the Python/NumPy heap (measured separately with
+tracemalloc, since tracing slows everything down).
+
+Usage:
+    python suite.py                              # human-readable table
+    python suite.py --json results.json          # also write machine-readable results
+    python suite.py --compare baseline.json      # exit non-zero if any case got slower than --threshold
+    python suite.py --filter browser             # only run cases whose name contains "browser"
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from masked_image import build_options
+from RGBMatrixEmulator import graphics
+from RGBMatrixEmulator.adapters import load_adapter
+from RGBMatrixEmulator.adapters.base import BaseAdapter
+from RGBMatrixEmulator.emulation.canvas import Canvas
+
+FONT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "samples", "fonts", "5x7.bdf"
+)
+IMAGE_FORMATS = ["BMP", "JPEG", "PNG", "WebP", "auto"]
+
+SHORT_TEXT = "LEADERBOARD"
+LONG_TEXT = "".join(
+    "{}. sce-member-{:02d} solved {} problems today ".format(i + 1, i, 9 - i)
+    for i in range(6)
+)
+
+
+class FrameCapture:
+    """
+    Stand-in display adapter that keeps a copy of the last frame it was given.
+    """
+
+    SUPPORTS_DIRTY_RECTS = False
+    presented_canvas = None
+
+    def draw_to_screen(self, pixels):
+        self.frame = np.array(pixels)
+
+
+def capture_frame(canvas):
+    """
+    Returns a copy of the canvas' current pixels, as its display adapter would receive them.
+    """
+    display_adapter = canvas.display_adapter
+    canvas.display_adapter = FrameCapture()
+
+    try:
+        canvas.draw_to_screen()
+
+        return canvas.display_adapter.frame
+    finally:
+        canvas.display_adapter = display_adapter
+
+
+def render_board(canvas, font, highlight):
+    """
+    Draws a leaderboard-like frame, so encoders see realistic content rather than noise.
+    """
+    canvas.Clear()
+    graphics.DrawText(canvas, font, 2, 8, graphics.Color(255, 200, 0), SHORT_TEXT)
+
+    for row in range(14):
+        if row == highlight:
+            color = graphics.Color(0, 255, 0)
+        else:
+            color = graphics.Color(200, 200, 200)
+
+        graphics.DrawText(
+            canvas,
+            font,
+            2,
+            18 + row * 8,
+            color,
+            "{:>2}. member-{:02d} {:>4}".format(row + 1, row, 1000 - row * 37),
+        )
+
+
+def build_cases(options, font):
+    options.display_adapter = load_adapter("null")
+    canvas = Canvas(options)
+    width, height = canvas.width, canvas.height
+    white = graphics.Color(255, 255, 255)
+
+    rng = np.random.default_rng(0)
+    image = Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+    # Two realistic frames that differ slightly, alternated so no call is served from a cache
+    frames = []
+    for highlight in range(2):
+        render_board(canvas, font, highlight)
+        frames.append(capture_frame(canvas))
+
+    cases = {
+        "draw_text_short": lambda i: graphics.DrawText(
+            canvas, font, 2, 10, white, SHORT_TEXT
+        ),
+        "draw_text_long": lambda i: graphics.DrawText(
+            canvas, font, 2, 10, white, LONG_TEXT
+        ),
+        "draw_text_clipped": lambda i: graphics.DrawText(
+            canvas, font, -600, 10, white, LONG_TEXT
+        ),
+        "draw_line": lambda i: graphics.DrawLine(
+            canvas, 0, 0, width - 1, height - 1, white
+        ),
+        "draw_circle": lambda i: graphics.DrawCircle(
+            canvas, width // 2, height // 2, min(width, height) // 2 - 1, white
+        ),
+        "set_image": lambda i: canvas.SetImage(image),
+        "canvas_clear": lambda i: canvas.Clear(),
+    }
+
+    masker = BaseAdapter(width, height, options)
+    cases["masked_image_changing"] = lambda i: masker._get_masked_image(frames[i % 2])
+    cases["masked_image_static"] = lambda i: masker._get_masked_image(frames[0])
+
+    browser_adapter = load_adapter("browser", suppress_errors=True)
+    if browser_adapter is not None:
+        for image_format in IMAGE_FORMATS:
+            options.browser.image_format = image_format
+            options.browser.transport = "image"
+
+            # Not loaded, so draw_to_screen encodes synchronously instead of handing off to the encoder thread
+            adapter = browser_adapter(width, height, options)
+            cases["browser_draw_to_screen[{}]".format(image_format)] = (
+                lambda i, adapter=adapter: adapter.draw_to_screen(frames[i % 2])
+            )
+
+    return cases
+
+
+def time_case(fn, min_time):
+    fn(0)
+
+    samples = []
+    start = time.perf_counter()
+    i = 0
+    while time.perf_counter() - start < min_time or len(samples) < 5:
+        call_start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - call_start)
+        i += 1
+
+    return np.array(samples)
+
+
+def peak_allocation(fn, calls=3):
+    tracemalloc.start()
+
+    try:
+        peak = 0
+        for i in range(calls):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            fn(i)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def run(cases, min_time):
+    results = []
+
+    for name, fn in cases.items():
+        samples = time_case(fn, min_time)
+        results.append(
+            {
+                "name": name,
+                "calls": len(samples),
+                "fps": 1.0 / samples.mean(),
+                "mean_ms": samples.mean() * 1000,
+                "p50_ms": np.percentile(samples, 50) * 1000,
+                "p95_ms": np.percentile(samples, 95) * 1000,
+                "peak_alloc_bytes": peak_allocation(fn),
+            }
+        )
+
+        print(
+            "{:<34} {:>10.1f} fps {:>9.3f} ms p50 {:>9.3f} ms p95 {:>10.1f} KiB peak".format(
+                name,
+                results[-1]["fps"],
+                results[-1]["p50_ms"],
+                results[-1]["p95_ms"],
+                results[-1]["peak_alloc_bytes"] / 1024,
+            )
+        )
+
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = {result["name"]: result for result in json.load(f)["results"]}
+
+    regressions = []
+    print("\nCompared to {}:".format(baseline_path))
+
+    for result in results:
+        before = baseline.get(result["name"])
+        if before is None:
+            continue
+
+        change = result["fps"] / before["fps"] - 1.0
+        regressed = change < -threshold
+        if regressed:
+            regressions.append(result["name"])
+
+        print(
+            "{:<34} {:>+8.1%}{}".format(
+                result["name"], change, "  REGRESSION" if regressed else ""
+            )
+        )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--min-time", default=1.0, type=float)
+    parser.add_argument("--filter", default="")
+    parser.add_argument("--json", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    parser.add_argument(
+        "--threshold",
+        default=0.10,
+        type=float,
+        help="Slowdown (as a fraction) that counts as a regression. Default: 0.10",
+    )
+    args = parser.parse_args()
+
+    options = build_options("square")
+    font = graphics.Font()
+    font.LoadFont(FONT_PATH)
+
+    cases = {
+        name: fn
+        for name, fn in build_cases(options, font).items()
+        if args.filter in name
+    }
+
+    print(
+        "{}x{} LEDs, {}px per LED, window {}\n".format(
+            options.cols * options.chain_length,
+            options.rows * options.parallel,
+            options.pixel_size,
+            options.window_size_str("px"),
+        )
+    )
+    results = run(cases, args.min_time)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "geometry": {
+                        "rows": options.rows,
+                        "cols": options.cols,
+                        "chain_length": options.chain_length,
+                        "parallel": options.parallel,
+                        "pixel_size": options.pixel_size,
+                    },
+                    "python": platform.python_version(),
+                    "numpy": np.__version__,
+                    "machine": platform.machine(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
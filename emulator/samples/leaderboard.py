@@ -1,12 +1,16 @@
 #!/usr/bin/env python
 import requests
 import json
+import threading
 import time
 from samplebase import SampleBase
 import os
 # Set the emulator to bind to the Raspberry Pi's IP address
 from RGBMatrixEmulator import graphics
 MAIN_URL='http://backend:8080/'
+# How often to poll the backend, and the (connect, read) timeouts for each request, in seconds
+POLL_INTERVAL = 60
+REQUEST_TIMEOUT = (3.05, 10)
 
 months_mapping = {
     0: "January",
@@ -23,9 +27,78 @@ months_mapping = {
     11: "December"
 }
 
+class LeaderboardFetcher(threading.Thread):
+    """
+    Polls the backend on a background thread, so a slow or hung backend can't freeze the display.
+
+    Requests reuse one session (and its connection), time out, and are conditional: once the backend has sent an
+    ETag or Last-Modified header, an unchanged leaderboard comes back as an empty 304. The last good leaderboard
+    is kept in `snapshot` and stays there through failed polls.
+    """
+
+    def __init__(self, url, interval=POLL_INTERVAL, timeout=REQUEST_TIMEOUT):
+        super(LeaderboardFetcher, self).__init__(daemon=True)
+        self.url = url
+        self.interval = interval
+        self.timeout = timeout
+        self.session = requests.Session()
+
+        # Replaced (never modified) by the fetch thread, so readers always see a complete leaderboard
+        self.snapshot = None
+        self.error = None
+
+        self.etag = None
+        self.last_modified = None
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.fetch()
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+
+    def fetch(self):
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+
+        try:
+            response = self.session.get(self.url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                self.error = None
+                return
+
+            response.raise_for_status()
+            data = response.json()
+            # The backend reports its own errors in the body
+            if "error" in data:
+                raise ValueError(data["error"])
+
+            # Extract just username + points for each entry
+            leaderboard = [
+                {
+                    "username": entry.get("username", "unknown"),
+                    "points": entry.get("points", 0)
+                }
+                for entry in data.get("leaderboard", [])
+            ]
+            self.snapshot = {"leaderboard": leaderboard, "month": data.get("month", -1)}
+            self.etag = response.headers.get("ETag")
+            self.last_modified = response.headers.get("Last-Modified")
+            self.error = None
+        except Exception as e:
+            print(f"Error fetching leaderboard: {e}")
+            self.error = e
+
+
 class LeaderboardDisplay(SampleBase):
     def __init__(self, *args, **kwargs):
         super(LeaderboardDisplay, self).__init__(*args, **kwargs)
+        self.use_frame_scheduler = True
         
         # Display configuration
         self.DISPLAY_WIDTH = 64
@@ -38,29 +111,26 @@ class LeaderboardDisplay(SampleBase):
         self.ENTRY_SPACING = 8
         self.LEFT_MARGIN = 2
 
-        # Max entries to display
+        # Max entries to display on one page, and the width of the username column in characters
         self.MAX_ENTRIES = 10
+        self.USERNAME_CHARS = 13
+
+        # Page rotation: how long each page is shown, and how long sliding to the next one takes (seconds)
+        self.PAGE_SECONDS = 10
+        self.TRANSITION_SECONDS = 0.6
 
     def fetch_leaderboard(self):
-        """Fetch leaderboard data from API."""
-        try:
-            response = requests.get(MAIN_URL)
-            data = response.json()  # Expecting a list of dicts
-            leaderboard = data.get("leaderboard", [])
-            month = data.get("month", -1)
-            # Extract just username + points for each entry
-            leaderboard = [
-                {
-                    "username": entry.get("username", "unknown"),
-                    "points": entry.get("points", 0)
-                }
-                for entry in leaderboard
-            ]
-            return {"leaderboard": leaderboard, "month": month}
-        except Exception as e:
-            print(f"Error fetching leaderboard: {e}")
+        """Latest leaderboard from the background fetcher. Never blocks on the network."""
+        snapshot = self.fetcher.snapshot
+        if snapshot is not None:
+            return snapshot
+
+        if self.fetcher.error is not None:
             return self.get_sample_data()
 
+        # Still waiting for the first response
+        return {"leaderboard": [], "month": -1}
+
     def get_sample_data(self):
         """Fallback data if API fails."""
         leaderboard =  [
@@ -72,89 +142,187 @@ class LeaderboardDisplay(SampleBase):
         ]
         return {"leaderboard": leaderboard, "month": -1}
 
-    def run(self):
-        offset_canvas = self.matrix.CreateFrameCanvas()
-        font = graphics.Font()
-        # Load a 5x7 or 6x10 font, etc., as you prefer
-        font.LoadFont("./fonts/5x7.bdf")
+    def build_scene(self, font):
+        """Lay out the display once; each frame only updates the text that changed."""
+        white = graphics.Color(255, 255, 255)
+        yellow = graphics.Color(255,191,0)
+
+        self.scene = graphics.Scene()
+
+        # 1) Title line
+        self.scene.add(graphics.TextNode(
+            font, self.LEFT_MARGIN, self.TITLE_Y,
+            yellow, " LeetCode Leaderboard"
+        ))
+
+        # 2) Header line: "Username    Points"
+        self.scene.add(graphics.TextNode(
+            font, self.LEFT_MARGIN, self.SUBTITLE_Y,
+            white, "Username        Points"
+        ))
+
+        # 3) One row per entry (rank, username, points), plus the month (or an error) below the last one.
+        # Usernames too long for their column scroll instead of being cut off.
+        self.font = font
+        self.char_width = font.CharacterWidth(ord(" "))
+        self.entry_nodes = []
+        for i in range(self.MAX_ENTRIES):
+            y = self.ENTRIES_START_Y + i * self.ENTRY_SPACING
+            self.entry_nodes.append((
+                self.scene.add(graphics.TextNode(font, self.LEFT_MARGIN, y, white)),
+                self.scene.add(graphics.MarqueeNode(None, self.LEFT_MARGIN, y)),
+                self.scene.add(graphics.TextNode(font, self.LEFT_MARGIN, y, white)),
+            ))
+        self.footer_node = self.scene.add(graphics.TextNode(
+            font, self.LEFT_MARGIN, self.ENTRIES_START_Y, yellow
+        ))
+
+        self.leaderboard_data = None
+        self.pages = [[]]
+        self.month = -1
+        self.error = False
+        self.page = 0
+        self.page_started = None
+        self.transition_started = None
+
+    def load_leaderboard(self, leaderboard_data):
+        """Format a new leaderboard into pages of (rank, username marquee, points, color) rows. Only runs when the data changes."""
         white = graphics.Color(255, 255, 255)
         yellow = graphics.Color(255,191,0)
         red = graphics.Color(255,0,0)
         blue = graphics.Color(126, 147, 255)
 
+        self.leaderboard_data = leaderboard_data
         try:
-            while True:
-                offset_canvas.Clear()
-
-                # 1) Title line
-                graphics.DrawText(
-                    offset_canvas, font,
-                    self.LEFT_MARGIN, self.TITLE_Y,
-                    yellow, " LeetCode Leaderboard"
-                )
+            rows = []
+            for i, entry in enumerate(leaderboard_data['leaderboard'], start=1):
+                username = entry["username"]
+                points   = entry["points"]
 
-                # 2) Header line: "Username    Points"
-                graphics.DrawText(
-                    offset_canvas, font,
-                    self.LEFT_MARGIN, self.SUBTITLE_Y,
-                    white, "Username        Points"
+                # Determine color based on rank
+                if i == 1:
+                    color = yellow  # First place
+                elif i == 2:
+                    color = red     # Second place
+                elif i == 3:
+                    color = blue    # Third place
+                else:
+                    color = white   # Everyone else
+
+                # Format: " 1. steeevin88    864", with the username in a scrolling column of USERNAME_CHARS
+                rank = f"{i:>2}. "
+                marquee = graphics.Marquee(
+                    self.font, color, username, width=self.USERNAME_CHARS * self.char_width
                 )
+                rows.append((rank, marquee, f" {points:>4}", color))
+
+            # Ranks 1-10 on the first page, 11-20 on the second, and so on
+            self.pages = [
+                rows[i:i + self.MAX_ENTRIES] for i in range(0, len(rows), self.MAX_ENTRIES)
+            ] or [[]]
+            self.month = leaderboard_data['month']
+            self.error = False
+
+        except Exception as e:
+            print(f"Error processing leaderboard: {e}")
+            self.pages = [[]]
+            self.error = True
+
+        if self.page >= len(self.pages):
+            self.page = 0
+            self.transition_started = None
+
+    def update_scene(self, now):
+        """Bring the scene up to date for the frame at time `now`."""
+        white = graphics.Color(255, 255, 255)
+        yellow = graphics.Color(255,191,0)
+
+        leaderboard_data = self.fetch_leaderboard()
+        if leaderboard_data is not self.leaderboard_data:
+            self.load_leaderboard(leaderboard_data)
+
+        if self.page_started is None:
+            self.page_started = now
 
-                # 3) Loop over top 5 entries
-                y_pos = self.ENTRIES_START_Y
-                try:
-                    leaderboard_data = self.fetch_leaderboard()
-                    leaderboard = leaderboard_data['leaderboard']
-                    month = leaderboard_data['month']
-                    for i, entry in enumerate(leaderboard, start=1):
-                        if i > self.MAX_ENTRIES:
-                            break
-
-                        username = entry["username"][:10]  # Limit username to 10 characters
-                        points   = entry["points"]
-
-                        # Determine color based on rank
-                        if i == 1:
-                            color = yellow  # First place
-                        elif i == 2:
-                            color = red     # Second place
-                        elif i == 3:
-                            color = blue    # Third place
-                        else:
-                            color = white   # Everyone else
-
-                        # Format: "1. steeevin88   864"
-                        text = f"{i}. {username:<13} {points:>4}"  # Adjust formatting for right alignment
-                        if i < 10:
-                            text = " " + text # super scuffed way to space it right
-                        graphics.DrawText(
-                            offset_canvas, font,
-                            self.LEFT_MARGIN, y_pos,
-                            color, text
-                        )
-                        y_pos += self.ENTRY_SPACING
-
-                    if month in months_mapping:
-                        graphics.DrawText(
-                            offset_canvas, font,
-                            self.LEFT_MARGIN, y_pos,
-                            yellow, f"    Month: {months_mapping[month]}"
-                        )
-
-                except Exception as e:
-                    print(f"Error processing leaderboard: {e}")
-                    graphics.DrawText(
-                        offset_canvas, font,
-                        self.LEFT_MARGIN, y_pos,
-                        white, "ERROR"
-                    )
-
-                # Swap buffers, sleep 60s
-                offset_canvas = self.matrix.SwapOnVSync(offset_canvas)
-                time.sleep(60)
+        # Start sliding to the next page once this one has been up long enough
+        if (
+            self.transition_started is None
+            and len(self.pages) > 1
+            and now - self.page_started >= self.PAGE_SECONDS
+        ):
+            self.transition_started = now
+
+        # The current page slides out to the left, then the next one slides in from the right
+        x_offset = 0
+        if self.transition_started is not None:
+            progress = (now - self.transition_started) / self.TRANSITION_SECONDS
+            width = self.matrix.width
+            if progress >= 1:
+                self.page = (self.page + 1) % len(self.pages)
+                self.page_started = now
+                self.transition_started = None
+            elif progress < 0.5:
+                x_offset = -int(progress * 2 * width)
+            else:
+                x_offset = int((1 - progress) * 2 * width)
+
+        page = self.page
+        if self.transition_started is not None and x_offset > 0:
+            page = (self.page + 1) % len(self.pages)
+
+        rows = self.pages[page]
+        x = self.LEFT_MARGIN + x_offset
+        for i, (rank_node, username_node, points_node) in enumerate(self.entry_nodes):
+            rank, marquee, points, color = rows[i] if i < len(rows) else ("", None, "", white)
+
+            rank_node.x = x
+            rank_node.color = color
+            rank_node.text = rank
+
+            username_node.x = x + len(rank) * self.char_width
+            username_node.marquee = marquee
+            username_node.update(now)
+
+            points_node.x = username_node.x + self.USERNAME_CHARS * self.char_width
+            points_node.color = color
+            points_node.text = points
+
+        self.footer_node.y = self.ENTRIES_START_Y + len(rows) * self.ENTRY_SPACING
+        if self.error:
+            self.footer_node.color = white
+            self.footer_node.text = "ERROR"
+        else:
+            self.footer_node.color = yellow
+            if self.month in months_mapping:
+                self.footer_node.text = f"    Month: {months_mapping[self.month]}"
+            else:
+                self.footer_node.text = ""
+
+    def draw_frame(self, canvas, now):
+        self.update_scene(now)
+
+        # Only the rows that changed are repainted (and re-encoded by the display adapter)
+        self.scene.render(canvas)
+
+    def run(self):
+        offset_canvas = self.matrix.CreateFrameCanvas()
+        font = graphics.Font()
+        # Load a 5x7 or 6x10 font, etc., as you prefer
+        font.LoadFont("./fonts/5x7.bdf")
+
+        self.build_scene(font)
+
+        self.fetcher = LeaderboardFetcher(MAIN_URL)
+        self.fetcher.start()
+
+        try:
+            # Frames where nothing moves or changes don't repaint anything, so idling at the frame rate is cheap
+            self.scheduler.run(self.matrix, offset_canvas, self.draw_frame)
 
         except KeyboardInterrupt:
             return
+        finally:
+            self.fetcher.stop()
 
 
 if __name__ == "__main__":
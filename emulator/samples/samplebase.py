@@ -1,4 +1,5 @@
 import argparse
+import collections
 import time
 import sys
 import os
@@ -6,6 +7,118 @@ import os
 from RGBMatrixEmulator import RGBMatrix, RGBMatrixOptions
 
 
+def positive_int(value):
+    """
+    argparse type for options like --fps, which can't be zero or negative.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1, got {}".format(value))
+    return number
+
+
+class FrameScheduler(object):
+    """
+    Runs a draw function at a fixed frame rate and keeps track of how long each frame takes.
+
+    Frame deadlines are fixed multiples of the frame period from the start, so timing doesn't drift no matter how
+    long individual frames take. If the loop falls more than a frame behind, the missed frames are dropped instead
+    of being rendered in a burst to catch up.
+
+    The scheduler is the only thing pacing frames: samples that set `use_frame_scheduler` turn off the emulator's
+    vsync, so SwapOnVSync doesn't wait for a second, competing deadline.
+    """
+
+    def __init__(self, fps, report_interval=0, history=240):
+        self.fps = fps
+        self.period = 1.0 / fps
+        self.report_interval = report_interval
+
+        # Per-frame timings (in seconds) for the most recent frames
+        self.frame_times = collections.deque(maxlen=history)
+        self.render_times = collections.deque(maxlen=history)
+        self.swap_times = collections.deque(maxlen=history)
+
+        self.frames = 0
+        self.overruns = 0
+        self.dropped = 0
+
+    def run(self, matrix, canvas, draw_frame, frames=None):
+        """
+        Calls draw_frame(canvas, now) once per frame, then swaps the canvas onto the matrix. `now` is the frame's
+        scheduled time (from time.perf_counter()), so animations advance evenly even when a frame starts late.
+        Runs forever, or for `frames` frames, and returns the current offscreen canvas.
+        """
+        start = time.perf_counter()
+        last_report = start
+        frame = 0
+
+        while frames is None or self.frames < frames:
+            deadline = start + frame * self.period
+            now = time.perf_counter()
+
+            if now < deadline:
+                time.sleep(deadline - now)
+            elif now - deadline >= self.period:
+                skipped = int((now - deadline) / self.period)
+                self.dropped += skipped
+                frame += skipped
+                deadline += skipped * self.period
+
+            frame_start = time.perf_counter()
+            draw_frame(canvas, deadline)
+            rendered = time.perf_counter()
+            canvas = matrix.SwapOnVSync(canvas)
+            swapped = time.perf_counter()
+
+            self.frame_times.append(frame_start)
+            self.render_times.append(rendered - frame_start)
+            self.swap_times.append(swapped - rendered)
+            self.frames += 1
+            frame += 1
+
+            # Over budget: this frame finished after the next one should have started
+            if swapped > deadline + self.period:
+                self.overruns += 1
+
+            if self.report_interval and swapped - last_report >= self.report_interval:
+                print(self.format_stats())
+                last_report = swapped
+
+        return canvas
+
+    def stats(self):
+        """Achieved frame rate and render/swap times (in ms) over the recent frames."""
+        render_times = sorted(self.render_times)
+        fps = None
+        if len(self.frame_times) > 1:
+            fps = (len(self.frame_times) - 1) / (self.frame_times[-1] - self.frame_times[0])
+
+        return {
+            "fps": fps,
+            "target_fps": self.fps,
+            "budget_ms": self.period * 1000,
+            "render_ms": sum(render_times) / len(render_times) * 1000 if render_times else None,
+            "render_p95_ms": render_times[int(0.95 * (len(render_times) - 1))] * 1000 if render_times else None,
+            "render_max_ms": render_times[-1] * 1000 if render_times else None,
+            "swap_ms": sum(self.swap_times) / len(self.swap_times) * 1000 if self.swap_times else None,
+            "frames": self.frames,
+            "overruns": self.overruns,
+            "dropped": self.dropped,
+        }
+
+    def format_stats(self):
+        stats = self.stats()
+        if stats["fps"] is None:
+            return "Frame stats: no frames yet"
+
+        return (
+            "Frame stats: {fps:.1f}/{target_fps} fps, render {render_ms:.2f} ms (p95 {render_p95_ms:.2f}, "
+            "max {render_max_ms:.2f}) of {budget_ms:.1f} ms budget, swap {swap_ms:.2f} ms, "
+            "{overruns} overruns, {dropped} dropped frames".format(**stats)
+        )
+
+
 class SampleBase(object):
     def __init__(self, *args, **kwargs):
         self.parser = argparse.ArgumentParser()
@@ -29,6 +142,11 @@ class SampleBase(object):
         self.parser.add_argument("--led-panel-type", action="store", help="Needed to initialize special panels. Supported: 'FM6126A'", default="", type=str)
         self.parser.add_argument("--led-no-drop-privs", dest="drop_privileges", help="Don't drop privileges from 'root' after initializing the hardware.", action='store_false')
         self.parser.set_defaults(drop_privileges=True)
+        self.parser.add_argument("--fps", action="store", help="Target frame rate for samples that run on the frame scheduler, which paces frames in place of the emulator's vsync. Default: 24", default=24, type=positive_int)
+        self.parser.add_argument("--frame-stats", action="store", help="Print frame timing stats every N seconds. Default: 0 (off)", default=0, type=float)
+
+        # Set by samples that pace their frames with self.scheduler
+        self.use_frame_scheduler = False
 
     def usleep(self, value):
         time.sleep(value / 1000000.0)
@@ -67,7 +185,12 @@ class SampleBase(object):
         if not self.args.drop_privileges:
           options.drop_privileges=False
 
+        # The scheduler paces these samples itself, and vsync would add a second, competing wait to every swap
+        if self.use_frame_scheduler:
+          options.vsync = False
+
         self.matrix = RGBMatrix(options = options)
+        self.scheduler = FrameScheduler(self.args.fps, report_interval=self.args.frame_stats)
 
         try:
             # Start loop
@@ -0,0 +1,280 @@
+import dataclasses
+import threading
+
+from modules.logger import logger
+
+
+# Same layout as cc/text-example.cc, so the sign looks identical whether it renders itself or blits this frame
+LEFT_MARGIN = 1
+LINE_GAP = 2
+MONTH_GAP = 4
+MAX_ENTRIES = 10
+MAX_USERNAME_LENGTH = 10
+
+WHITE = (255, 255, 255)
+YELLOW = (255, 191, 0)
+RED = (255, 0, 0)
+BLUE = (126, 147, 255)
+
+MONTH_NAMES = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+
+FORMATS = ["rgb", "rgb565", "rle"]
+
+# Run-length encoded frames pack a palette index and a run length into each byte
+RLE_INDEX_BITS = 3
+RLE_LENGTH_BITS = 8 - RLE_INDEX_BITS
+RLE_MAX_COLORS = 1 << RLE_INDEX_BITS
+RLE_MAX_RUN = 1 << RLE_LENGTH_BITS
+
+# rgb565 bytes as translation tables, so each channel's share of a byte is looked up for a whole frame at once
+RGB565_LOW_GREEN = bytes((value >> 2 & 0x07) << 5 for value in range(256))
+RGB565_LOW_BLUE = bytes(value >> 3 for value in range(256))
+RGB565_HIGH_RED = bytes(value & 0xF8 for value in range(256))
+RGB565_HIGH_GREEN = bytes(value >> 5 for value in range(256))
+
+@dataclasses.dataclass
+class Glyph:
+    device_width: int
+    width: int
+    height: int
+    x_offset: int
+    y_offset: int
+    rows: list[int]
+
+
+@dataclasses.dataclass
+class BdfFont:
+    height: int
+    baseline: int
+    glyphs: dict[int, Glyph]
+
+
+def load_bdf_font(path: str) -> BdfFont:
+    """
+    Parses the parts of a BDF font needed to draw text the way rpi-rgb-led-matrix does.
+    """
+    height = baseline = 0
+    glyphs = {}
+    codepoint = device_width = None
+    bbx = None
+    rows = None
+
+    with open(path, encoding="latin-1") as f:
+        for line in f:
+            fields = line.split()
+            if not fields:
+                continue
+
+            keyword = fields[0]
+            if keyword == "FONTBOUNDINGBOX":
+                height = int(fields[2])
+                baseline = height + int(fields[4])
+            elif keyword == "ENCODING":
+                codepoint = int(fields[1])
+            elif keyword == "DWIDTH":
+                device_width = int(fields[1])
+            elif keyword == "BBX":
+                bbx = [int(field) for field in fields[1:5]]
+            elif keyword == "BITMAP":
+                rows = []
+            elif keyword == "ENDCHAR":
+                width, glyph_height, x_offset, y_offset = bbx
+                # Rows are hex, left-aligned to a whole number of bytes
+                padding = len(rows[0]) * 4 - width if rows else 0
+                glyphs[codepoint] = Glyph(
+                    device_width,
+                    width,
+                    glyph_height,
+                    x_offset,
+                    y_offset,
+                    [int(row, 16) >> padding for row in rows],
+                )
+                rows = None
+            elif rows is not None:
+                rows.append(keyword)
+
+    return BdfFont(height, baseline, glyphs)
+
+
+def draw_text(
+    frame: bytearray,
+    width: int,
+    height: int,
+    font: BdfFont,
+    x: int,
+    y: int,
+    color: tuple,
+    text: str,
+) -> None:
+    """
+    Draws text with its baseline at y into a packed RGB frame, clipping anything outside of it.
+    """
+    pixel = bytes(color)
+    for char in text:
+        glyph = font.glyphs.get(ord(char), font.glyphs.get(0xFFFD))
+        if glyph is None:
+            continue
+
+        top = y - glyph.height - glyph.y_offset
+        for row_index, row in enumerate(glyph.rows):
+            pixel_y = top + row_index
+            if pixel_y < 0 or pixel_y >= height:
+                continue
+
+            for column in range(glyph.width):
+                pixel_x = x + glyph.x_offset + column
+                if row >> (glyph.width - 1 - column) & 1 and 0 <= pixel_x < width:
+                    offset = (pixel_y * width + pixel_x) * 3
+                    frame[offset : offset + 3] = pixel
+
+        x += glyph.device_width
+
+
+def render_leaderboard(
+    leaderboard_data: dict, width: int, height: int, font: BdfFont
+) -> bytearray:
+    """
+    Renders the sign as a packed, row-major RGB frame.
+    """
+    frame = bytearray(width * height * 3)
+    x = LEFT_MARGIN
+    y = font.baseline + LINE_GAP
+
+    draw_text(frame, width, height, font, x, y, YELLOW, "   LeetCode Leaderboard")
+    y += font.height + LINE_GAP
+
+    draw_text(frame, width, height, font, x, y, WHITE, "Username           Points")
+    y += font.height + LINE_GAP
+
+    for rank, entry in enumerate(leaderboard_data["leaderboard"][:MAX_ENTRIES], start=1):
+        username = entry.get("username")
+        if not isinstance(username, str):
+            username = "unknown"
+        username = username[:MAX_USERNAME_LENGTH]
+        points = entry.get("points")
+        if not isinstance(points, int):
+            points = 0
+        color = {1: YELLOW, 2: RED, 3: BLUE}.get(rank, WHITE)
+
+        draw_text(frame, width, height, font, x, y, color, f"{rank:2d}. {username:<10} {points:10d}")
+        y += font.height + LINE_GAP
+
+    month = leaderboard_data.get("month", -1)
+    if 0 <= month <= 11:
+        draw_text(frame, width, height, font, x, y + MONTH_GAP, YELLOW, "     Month: " + MONTH_NAMES[month])
+
+    return frame
+
+
+def combine_bytes(a: bytes, b: bytes) -> bytes:
+    """
+    ORs two equally long byte strings together.
+    """
+    return (int.from_bytes(a, "big") | int.from_bytes(b, "big")).to_bytes(len(a), "big")
+
+
+def encode_frame(frame: bytearray, frame_format: str) -> bytes:
+    """
+    Encodes a packed RGB frame as:
+
+    rgb:    3 bytes per pixel, R, G, B
+    rgb565: 2 bytes per pixel, little-endian RRRRRGGGGGGBBBBB
+    rle:    a color count byte, that many R, G, B palette entries, then one byte per run of identical pixels,
+            holding the palette index in its top 3 bits and the run length minus 1 in its bottom 5 bits.
+            Runs continue across rows.
+    """
+    if frame_format == "rgb":
+        return bytes(frame)
+
+    if frame_format == "rgb565":
+        pixels = len(frame) // 3
+        red, green, blue = bytes(frame[0::3]), bytes(frame[1::3]), bytes(frame[2::3])
+        encoded = bytearray(pixels * 2)
+        # Each byte of a pixel combines two channels, which don't overlap, so whole rows of bytes can be OR'd at once
+        encoded[0::2] = combine_bytes(green.translate(RGB565_LOW_GREEN), blue.translate(RGB565_LOW_BLUE))
+        encoded[1::2] = combine_bytes(red.translate(RGB565_HIGH_RED), green.translate(RGB565_HIGH_GREEN))
+        return bytes(encoded)
+
+    if frame_format == "rle":
+        palette = {}
+        runs = bytearray()
+        previous, length = None, 0
+        for pixel in zip(frame[0::3], frame[1::3], frame[2::3]):
+            if pixel == previous and length < RLE_MAX_RUN:
+                length += 1
+                continue
+
+            if previous is not None:
+                runs.append(palette[previous] << RLE_LENGTH_BITS | (length - 1))
+
+            if pixel not in palette:
+                if len(palette) == RLE_MAX_COLORS:
+                    raise ValueError(f"rle frames support at most {RLE_MAX_COLORS} colors")
+                palette[pixel] = len(palette)
+
+            previous, length = pixel, 1
+
+        if previous is not None:
+            runs.append(palette[previous] << RLE_LENGTH_BITS | (length - 1))
+
+        header = bytearray([len(palette)])
+        for color in palette:
+            header.extend(color)
+
+        return bytes(header + runs)
+
+    raise ValueError(f"Unknown frame format {frame_format}, expected one of {FORMATS}")
+
+
+class SignFrameCache:
+    """
+    Rendered and encoded sign frames for the current leaderboard, keyed by geometry and format.
+
+    Frames are only rendered again once the leaderboard's ETag changes. Callers limit the geometries that can be
+    requested, so the cache holds at most one frame per allowed geometry and format. Rendering happens outside of
+    the cache's lock, so a slow render only holds up requests for the same geometry and format.
+    """
+
+    def __init__(self, font_path: str):
+        self.font_path = font_path
+        self.font = None
+        self.leaderboard_etag = None
+        self.frames = {}
+        self.render_locks = {}
+        self.lock = threading.Lock()
+
+    def get(self, leaderboard_data: dict, leaderboard_etag: str, width: int, height: int, frame_format: str) -> bytes:
+        key = (width, height, frame_format)
+        with self.lock:
+            if leaderboard_etag != self.leaderboard_etag:
+                self.leaderboard_etag = leaderboard_etag
+                self.frames.clear()
+
+            if key in self.frames:
+                return self.frames[key]
+
+            # Loaded on first use, so a missing font only breaks this endpoint
+            if self.font is None:
+                self.font = load_bdf_font(self.font_path)
+
+            font = self.font
+            render_lock = self.render_locks.setdefault(key, threading.Lock())
+
+        # Concurrent misses for the same frame wait for the first render instead of repeating it
+        with render_lock:
+            with self.lock:
+                if leaderboard_etag == self.leaderboard_etag and key in self.frames:
+                    return self.frames[key]
+
+            frame = encode_frame(render_leaderboard(leaderboard_data, width, height, font), frame_format)
+            logger.info(f"Rendered {width}x{height} {frame_format} sign frame, {len(frame)} bytes")
+
+            with self.lock:
+                # Don't cache a frame for a leaderboard that changed while it was rendering
+                if leaderboard_etag == self.leaderboard_etag:
+                    self.frames[key] = frame
+
+            return frame
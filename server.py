@@ -1,4 +1,6 @@
 import datetime
+import hashlib
+import json
 import logging
 import sys
 import uvicorn
@@ -17,6 +19,7 @@ import prometheus_client
 
 from modules import args
 from modules import leetcode_helpers
+from modules import sign_frame
 from modules import sqlite_helpers
 from modules.logger import logger
 from modules.metrics import MetricsHandler
@@ -58,18 +61,31 @@ with open(arguments.config, "r") as stream:
         SQLITE_FILE_NAME = data.get("sqlite3_file_name", "users.db")
         TIME_ZONE = data.get("local_timezone", "UTC")
         POINTS = data.get("points", {})
+        SIGN_WIDTH = data.get("sign_width", 128)
+        SIGN_HEIGHT = data.get("sign_height", 128)
+        SIGN_FONT = data.get("sign_font", "5x7.bdf")
+        # Every geometry a client may request, so clients can't make the server render arbitrarily many frames
+        SIGN_SIZES = [(SIGN_WIDTH, SIGN_HEIGHT)] + [
+            tuple(int(n) for n in size.split("x")) for size in data.get("sign_extra_sizes", [])
+        ]
     except Exception:
         logger.exception("unable to open yaml file / file is missing data, exiting")
         sys.exit(1)
 
 metrics_handler = MetricsHandler.instance()
+sign_frame_cache = sign_frame.SignFrameCache(SIGN_FONT)
 
 @app.get("/")
-def get_leaderboard():
+def get_leaderboard(request: Request, response: Response):
     try:
         leaderboard_data = leaderboard()
         MetricsHandler.sign_last_updated.set(time.time())
         MetricsHandler.sign_update_error.set(0)
+        # Lets the sign send If-None-Match and skip downloading an unchanged leaderboard
+        etag = leaderboard_etag(leaderboard_data)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
         return leaderboard_data
     except Exception as e:
         MetricsHandler.sign_update_error.set(1)
@@ -77,6 +93,44 @@ def get_leaderboard():
         return {"error": str(e), "status_code": 500}
 
 
+@app.get("/sign/frame")
+def get_sign_frame(request: Request, width: int = None, height: int = None, format: str = "rgb"):
+    width = SIGN_WIDTH if width is None else width
+    height = SIGN_HEIGHT if height is None else height
+    if format not in sign_frame.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sign_frame.FORMATS}")
+    if (width, height) not in SIGN_SIZES:
+        sizes = ", ".join(f"{w}x{h}" for w, h in SIGN_SIZES)
+        raise HTTPException(status_code=400, detail=f"width and height must be one of {sizes}")
+
+    try:
+        leaderboard_data = leaderboard()
+        etag = leaderboard_etag(leaderboard_data)
+        # The same leaderboard renders to a different frame at each geometry and format
+        frame_etag = etag[:-1] + f'-{width}x{height}-{format}"'
+        headers = {
+            "ETag": frame_etag,
+            "Cache-Control": "no-cache",
+            "X-Frame-Width": str(width),
+            "X-Frame-Height": str(height),
+            "X-Frame-Format": format,
+        }
+        if request.headers.get("if-none-match") == frame_etag:
+            MetricsHandler.sign_last_updated.set(time.time())
+            MetricsHandler.sign_update_error.set(0)
+            return Response(status_code=304, headers=headers)
+
+        frame = sign_frame_cache.get(leaderboard_data, etag, width, height, format)
+        MetricsHandler.sign_last_updated.set(time.time())
+        MetricsHandler.sign_update_error.set(0)
+        return Response(content=frame, media_type="application/octet-stream", headers=headers)
+    except Exception as e:
+        MetricsHandler.sign_update_error.set(1)
+        logger.exception(f"Error rendering sign frame: {str(e)}")
+        # Unlike the JSON endpoints, a 200 here would be blitted to the sign as pixels
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/user/add")
 async def add_user(request: Request):
     try:
@@ -198,6 +252,12 @@ def leaderboard():
     }
 
 
+def leaderboard_etag(leaderboard_data):
+    """Strong ETag for a leaderboard payload, which changes whenever its content does."""
+    payload = json.dumps(leaderboard_data, sort_keys=True, default=str)
+    return '"' + hashlib.sha1(payload.encode()).hexdigest() + '"'
+
+
 def poll_leetcode():
     while not leetcode_stop_event.is_set():
         try: